@@ -0,0 +1,191 @@
+"""Пакетный анализ позиций: лучший ход, оценка и сводка угроз.
+
+Пример:
+    from analysis import analyze_positions
+    results = analyze_positions([[(7, 7), (7, 8)], board_array], workers=4)
+"""
+import multiprocessing
+import patterns
+from bitboard import DIRECTIONS
+from config import config
+from game import GomokuGame
+from bot import GomokuBot
+
+PLAYERS = ('black', 'white')
+
+# Классы угроз, попадающие в сводку, от сильных к слабым
+THREAT_CLASSES = [patterns.FIVE, patterns.OPEN_FOUR, patterns.FOUR, patterns.OPEN_THREE]
+
+_STONE_VALUES = {1: 'black', 2: 'white', 'black': 'black', 'white': 'white', 'B': 'black', 'W': 'white'}
+
+def is_move_list(position):
+    """Список ходов [(row, col), ...], а не двумерный массив доски"""
+    size = len(position)
+    return not (size >= 5 and all(len(row) == size for row in position))
+
+def _winning_stone(stones):
+    """Камень, который должен быть поставлен последним, если среди stones
+    есть пятерка: он входит во все пятерки (до него ни одной не было).
+    None, если пятерок нет."""
+    stone_set = set(stones)
+    common = None
+    for row, col in stones:
+        for dx, dy in DIRECTIONS:
+            segment = [(row + dx * step, col + dy * step) for step in range(5)]
+            if all(cell in stone_set for cell in segment):
+                common = set(segment) if common is None else common & set(segment)
+    if common is None:
+        return None
+    if not common:
+        raise ValueError("Impossible position: fives without a common stone")
+    return min(common)
+
+def board_to_moves(board):
+    """Двумерный массив (None/0 - пусто, 1/'black' - черные, 2/'white' - белые)
+    в последовательность ходов, приводящую к той же позиции.
+
+    Если на доске есть пятерка, ее замыкающий камень ставится последним,
+    иначе партия закончилась бы раньше и цвета следующих камней сбились бы.
+    """
+    stones = {'black': [], 'white': []}
+    for i, row in enumerate(board):
+        for j, value in enumerate(row):
+            if not value:
+                continue
+            if value not in _STONE_VALUES:
+                raise ValueError(f"Unknown cell value at ({i}, {j}): {value!r}")
+            stones[_STONE_VALUES[value]].append((i, j))
+
+    black, white = stones['black'], stones['white']
+    if len(black) not in (len(white), len(white) + 1):
+        raise ValueError(f"Impossible position: {len(black)} black and {len(white)} white stones")
+
+    winners = [player for player in PLAYERS if _winning_stone(stones[player]) is not None]
+    if len(winners) > 1:
+        raise ValueError("Impossible position: both players have a five")
+    if winners:
+        winner = winners[0]
+        # Победитель сделал последний ход партии
+        if (winner == 'black') != (len(black) > len(white)):
+            raise ValueError(f"Impossible position: {winner} has a five but did not move last")
+        last = _winning_stone(stones[winner])
+        stones[winner].remove(last)
+        stones[winner].append(last)
+
+    moves = []
+    for index, move in enumerate(black):
+        moves.append(move)
+        if index < len(white):
+            moves.append(white[index])
+    return moves
+
+class PositionAnalyzer:
+    """Анализирует позиции одной партией и одним ботом.
+
+    Переход к следующей позиции идет через pop/push от общего префикса,
+    поэтому таблица транспозиций, кеш решателя угроз и оценщик линий
+    переиспользуются на всем пакете.
+    """
+
+    def __init__(self, board_size=None, difficulty='hard'):
+        self.game = GomokuGame({}, board_size)
+        self.bot = GomokuBot(self.game, difficulty)
+
+    def load(self, position):
+        if is_move_list(position):
+            moves = [tuple(move) for move in position]
+        else:
+            if len(position) != self.game.board_size:
+                raise ValueError(f"Board size {len(position)} does not match analyzer size {self.game.board_size}")
+            moves = board_to_moves(position)
+
+        for row, col in moves:
+            if not (0 <= row < self.game.board_size and 0 <= col < self.game.board_size):
+                raise ValueError(f"Move out of board: ({row}, {col})")
+        if len(set(moves)) != len(moves):
+            raise ValueError("Position contains repeated moves")
+
+        self.game.sync_history(moves)
+        # В undo_stack хранится game_over до каждого хода: ход после пятерки
+        # был бы сыгран не тем цветом и описывал бы другую позицию
+        if any(game_over for _, _, _, _, game_over, _ in self.game.undo_stack):
+            self.game.sync_history([])
+            raise ValueError("Position continues after the game is over")
+
+    def threat_summary(self, player):
+        """Число пустых клеток-кандидатов по наивысшему классу угрозы, который дает ход player"""
+        summary = {patterns.CLASS_NAMES[threat]: 0 for threat in THREAT_CLASSES}
+        if self.game.move_count == 0:
+            return summary
+
+        for row, col in self.game.get_candidates():
+            threat = max(patterns.lookup(self.game, row, col, direction, player)[0] for direction in range(4))
+            if threat >= THREAT_CLASSES[-1]:
+                summary[patterns.CLASS_NAMES[threat]] += 1
+        return summary
+
+    def analyze(self, position):
+        self.load(position)
+        game = self.game
+        result = {
+            'moves': game.move_count,
+            'to_move': None if game.game_over else game.current_player,
+            'winner': game.winner,
+            'best_move': None,
+            'score': None,
+            'threats': {player: self.threat_summary(player) for player in PLAYERS}
+        }
+        if game.game_over:
+            return result
+
+        best_move = self.bot.make_move()
+        result['best_move'] = tuple(best_move) if best_move else None
+        if self.bot.last_score is not None:
+            result['score'] = self.bot.last_score
+        else:
+            # Эвристический ход без результата поиска - статическая оценка
+            result['score'] = self.bot.evaluate_board(game.current_player)
+        return result
+
+    def analyze_many(self, positions):
+        return [self.analyze(position) for position in positions]
+
+    def close(self):
+        self.bot.close()
+
+# Анализатор процесса-воркера
+_worker_analyzer = None
+
+def _init_worker(settings, board_size, difficulty):
+    global _worker_analyzer
+    config.__dict__.update(settings)
+    # Вложенный пул в процессе пула создать нельзя
+    config.search_workers = 1
+    _worker_analyzer = PositionAnalyzer(board_size, difficulty)
+
+def _analyze_position(position):
+    return _worker_analyzer.analyze(position)
+
+def analyze_positions(positions, board_size=None, difficulty='hard', workers=None):
+    """Анализ последовательности позиций; результаты в том же порядке.
+
+    workers > 1 распределяет позиции по пулу процессов, у каждого воркера
+    свой анализатор со своими кешами.
+    """
+    positions = list(positions)
+    if board_size is None:
+        board = next((position for position in positions if not is_move_list(position)), None)
+        board_size = len(board) if board is not None else config.board_size
+
+    if workers and workers > 1 and len(positions) > 1:
+        # Порции побольше, чтобы соседние позиции (часто из одной партии) шли одному воркеру
+        chunksize = max(1, len(positions) // (workers * 4))
+        settings = dict(vars(config))
+        with multiprocessing.Pool(workers, _init_worker, (settings, board_size, difficulty)) as pool:
+            return pool.map(_analyze_position, positions, chunksize)
+
+    analyzer = PositionAnalyzer(board_size, difficulty)
+    try:
+        return analyzer.analyze_many(positions)
+    finally:
+        analyzer.close()
\ No newline at end of file
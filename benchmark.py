@@ -0,0 +1,187 @@
+"""Бенчмарк горячих функций бота на фиксированном наборе позиций.
+
+Кроме эвристик замеряются фазы хода сложного бота: генерация и
+сортировка ходов, статическая оценка, negamax и search_move на
+фиксированную глубину (без контроля времени) и решатель угроз.
+Таблица транспозиций и кеш решателя очищаются перед каждым прогоном.
+
+Пример:
+    python benchmark.py --output bench.json
+    python benchmark.py --compare bench.json --threshold 10
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+from config import config
+from game import GomokuGame
+from bot import GomokuBot, WIN_SCORE
+
+BOARD_SIZES = [5, 9, 15]
+
+# Доля заполненных клеток для каждой фазы партии
+PHASES = {
+    'opening': 0.05,
+    'midgame': 0.35,
+    'near_full': 0.85
+}
+
+CORPUS_SEED = 2024
+
+# Глубина negamax и search_move в бенчмарке
+SEARCH_DEPTH = 3
+
+ROUTINES = [
+    'find_winning_move',
+    'find_threat_move',
+    'strategic_move',
+    'fast_check_win',
+    'generate_moves',
+    'evaluate_board',
+    'negamax',
+    'search_move',
+    'find_vcf',
+    'find_vct'
+]
+
+def build_position(board_size, fill, seed):
+    """Детерминированная позиция: случайные ходы, не дающие пятерки"""
+    rng = random.Random(seed)
+    game = GomokuGame({}, board_size)
+    target = max(1, int(board_size * board_size * fill))
+
+    while game.move_count < target:
+        empty = [
+            (i, j) for i in range(board_size) for j in range(board_size)
+            if game.board[i][j] is None and not game.would_win(i, j, game.current_player)
+        ]
+        if not empty:
+            break
+        game.push(rng.choice(empty))
+
+    return game
+
+def build_corpus():
+    corpus = []
+    for board_size in BOARD_SIZES:
+        for index, (phase, fill) in enumerate(PHASES.items()):
+            seed = CORPUS_SEED + board_size * 10 + index
+            corpus.append((f"{board_size}/{phase}", build_position(board_size, fill, seed)))
+    return corpus
+
+def routine_call(bot, name):
+    game = bot.game
+    opponent = 'black' if game.current_player == 'white' else 'white'
+
+    if name == 'find_winning_move':
+        return lambda: bot.find_winning_move(game.current_player)
+    if name == 'find_threat_move':
+        return lambda: bot.find_threat_move(opponent)
+    if name == 'fast_check_win':
+        stones = [(i, j) for i in range(game.board_size) for j in range(game.board_size) if game.board[i][j]]
+        return lambda: [game.fast_check_win(i, j) for i, j in stones]
+    if name == 'generate_moves':
+        return lambda: bot.generate_moves(game.current_player)
+    if name == 'evaluate_board':
+        return lambda: bot.evaluate_board(game.current_player)
+    if name == 'negamax':
+        return lambda: bot.negamax(SEARCH_DEPTH, -WIN_SCORE * 2, WIN_SCORE * 2)
+    if name == 'search_move':
+        return lambda: bot.search_move(SEARCH_DEPTH)
+    if name in ('find_vcf', 'find_vct'):
+        return getattr(bot.threat_solver, name)
+    return getattr(bot, name)
+
+def reset_bot(bot):
+    """Каждый прогон начинается с пустых кешей и без ограничения по времени"""
+    bot.tt.clear()
+    bot.threat_solver.cache.clear()
+    bot.nodes = 0
+    bot.threat_solver.nodes = 0
+    bot.deadline = float('inf')
+
+def time_routine(bot, call, repeat, seed):
+    timings = []
+    for _ in range(repeat):
+        reset_bot(bot)
+        # Одинаковое состояние random для каждого прогона
+        random.seed(seed)
+        started = time.perf_counter()
+        call()
+        timings.append(time.perf_counter() - started)
+    return {
+        'mean_us': round(sum(timings) / len(timings) * 1e6, 2),
+        'min_us': round(min(timings) * 1e6, 2)
+    }
+
+def run(repeat, seed):
+    results = {}
+    # Поиск на фиксированную глубину: время не зависит от скорости машины
+    saved = (config.time_control, config.search_time_ms, config.search_node_limit)
+    config.time_control = False
+    config.search_time_ms = 10 ** 9
+    config.search_node_limit = 10 ** 9
+    try:
+        for name, game in build_corpus():
+            bot = GomokuBot(game, 'hard')
+            for routine in ROUTINES:
+                results[f"{name}/{routine}"] = time_routine(bot, routine_call(bot, routine), repeat, seed)
+    finally:
+        config.time_control, config.search_time_ms, config.search_node_limit = saved
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeat': repeat,
+            'seed': seed,
+            'date': time.strftime('%Y-%m-%dT%H:%M:%S')
+        },
+        'results': results
+    }
+
+def compare(report, baseline, threshold):
+    """Печатает изменение относительно baseline; возвращает число регрессий"""
+    regressions = 0
+    print(f"{'benchmark':<45} {'baseline us':>12} {'current us':>12} {'change':>8}")
+    for key, current in report['results'].items():
+        previous = baseline['results'].get(key)
+        if not previous:
+            print(f"{key:<45} {'-':>12} {current['min_us']:>12} {'new':>8}")
+            continue
+        change = (current['min_us'] - previous['min_us']) / previous['min_us'] * 100 if previous['min_us'] else 0
+        mark = ' !' if change > threshold else ''
+        if mark:
+            regressions += 1
+        print(f"{key:<45} {previous['min_us']:>12} {current['min_us']:>12} {change:>+7.1f}%{mark}")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark GomokuBot heuristics on fixed positions")
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0, help="random seed for the bot heuristics")
+    parser.add_argument('--output', help="save results to this JSON file")
+    parser.add_argument('--compare', help="baseline JSON file to compare against")
+    parser.add_argument('--threshold', type=float, default=10.0, help="regression threshold, %%")
+    args = parser.parse_args(argv)
+
+    report = run(args.repeat, args.seed)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=4, ensure_ascii=False)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"\n{regressions} regression(s) above {args.threshold}%")
+            sys.exit(1)
+    else:
+        for key, result in report['results'].items():
+            print(f"{key:<45} mean {result['mean_us']:>10} us  min {result['min_us']:>10} us")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,137 @@
+DIRECTIONS = [(1, 0), (0, 1), (1, 1), (1, -1)]
+
+class BitBoard:
+    """Битовое представление доски.
+
+    Для каждого цвета хранится один int на всю доску (бит row * size + col)
+    и по одному int на каждую линию - столбец, строку, диагональ и
+    антидиагональ, где i-й бит соответствует i-й клетке линии. Победа и
+    выборка окна вокруг клетки сводятся к сдвигам и AND.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.cell_lines = self._precalculate_cell_lines()
+        line_count = 2 * size + 2 * (2 * size - 1)
+        self.stones = {'black': 0, 'white': 0}
+        self.lines = {'black': [0] * line_count, 'white': [0] * line_count}
+        self.line_lengths = [0] * line_count
+        for row in self.cell_lines:
+            for cell in row:
+                for line_id, offset in cell:
+                    self.line_lengths[line_id] = max(self.line_lengths[line_id], offset + 1)
+        # Обратная таблица: (линия, позиция в линии) -> клетка
+        self.line_cells = [[None] * length for length in self.line_lengths]
+        for r, row in enumerate(self.cell_lines):
+            for c, cell in enumerate(row):
+                for line_id, offset in cell:
+                    self.line_cells[line_id][offset] = (r, c)
+
+    def _precalculate_cell_lines(self):
+        """Для каждой клетки - (линия, позиция в линии) по четырем направлениям"""
+        size = self.size
+        cell_lines = []
+
+        for r in range(size):
+            row = []
+            for c in range(size):
+                row.append((
+                    (c, r),
+                    (size + r, c),
+                    (2 * size + r - c + size - 1, min(r, c)),
+                    (2 * size + 2 * size - 1 + r + c, r - max(0, r + c - (size - 1)))
+                ))
+            cell_lines.append(row)
+
+        return cell_lines
+
+    def clear(self):
+        self.stones = {'black': 0, 'white': 0}
+        for player in self.lines:
+            self.lines[player] = [0] * len(self.line_lengths)
+
+    def set(self, row, col, player):
+        self.stones[player] |= 1 << (row * self.size + col)
+        lines = self.lines[player]
+        for line_id, offset in self.cell_lines[row][col]:
+            lines[line_id] |= 1 << offset
+
+    def unset(self, row, col, player):
+        self.stones[player] &= ~(1 << (row * self.size + col))
+        lines = self.lines[player]
+        for line_id, offset in self.cell_lines[row][col]:
+            lines[line_id] &= ~(1 << offset)
+
+    def is_empty(self, row, col):
+        bit = 1 << (row * self.size + col)
+        return not ((self.stones['black'] | self.stones['white']) & bit)
+
+    def would_win(self, row, col, player):
+        """Образуется ли пятерка через (row, col), если там стоит камень player"""
+        lines = self.lines[player]
+        for line_id, offset in self.cell_lines[row][col]:
+            x = lines[line_id] | (1 << offset)
+            # Бит k выставлен, если с позиции k начинается пять подряд
+            fives = x & (x >> 1) & (x >> 2) & (x >> 3) & (x >> 4)
+            if fives:
+                low = max(0, offset - 4)
+                if (fives >> low) & ((1 << (offset - low + 1)) - 1):
+                    return True
+        return False
+
+    def winning_cells(self, player):
+        """Пустые клетки, где камень player сразу дает пятерку.
+
+        Просматриваются только линии, где у player не меньше четырех
+        камней, поэтому на обычной позиции это дешевле, чем would_win
+        по всем кандидатам.
+        """
+        opponent = 'black' if player == 'white' else 'white'
+        own_lines = self.lines[player]
+        opp_lines = self.lines[opponent]
+        cells = set()
+
+        for line_id, own in enumerate(own_lines):
+            if bin(own).count('1') < 4:
+                continue
+            taken = own | opp_lines[line_id]
+            for start in range(self.line_lengths[line_id] - 4):
+                window = 31 << start
+                gap = window & ~own
+                # В окне из пяти клеток четыре своих камня и одна пустая
+                if gap and not gap & (gap - 1) and not gap & taken:
+                    cells.add(self.line_cells[line_id][gap.bit_length() - 1])
+
+        return sorted(cells)
+
+    def stones_near(self, row, col, direction, player, radius=4):
+        """Число камней player на линии direction не дальше radius от (row, col)"""
+        line_id, offset = self.cell_lines[row][col][direction]
+        low = max(0, offset - radius)
+        bits = (self.lines[player][line_id] >> low) & ((1 << (offset - low + radius + 1)) - 1)
+        return bin(bits).count('1')
+
+    def window(self, row, col, direction, player, radius=4):
+        """Окно из 2 * radius + 1 клеток линии с центром в (row, col).
+
+        Возвращает (own, opp, outside): битовые маски камней player,
+        камней соперника и клеток за краем доски; бит 0 - дальний конец
+        в отрицательном направлении.
+        """
+        opponent = 'black' if player == 'white' else 'white'
+        line_id, offset = self.cell_lines[row][col][direction]
+        width = 2 * radius + 1
+        full = (1 << width) - 1
+        low = offset - radius
+        on_board = (1 << self.line_lengths[line_id]) - 1
+
+        if low >= 0:
+            own = self.lines[player][line_id] >> low
+            opp = self.lines[opponent][line_id] >> low
+            inside = on_board >> low
+        else:
+            own = self.lines[player][line_id] << -low
+            opp = self.lines[opponent][line_id] << -low
+            inside = on_board << -low
+
+        return own & full, opp & full, ~inside & full
\ No newline at end of file
@@ -1,12 +1,53 @@
+import multiprocessing
 import random
+import time
 from config import config
+from game import GomokuGame
+import patterns
+import opening_book
+from threats import ThreatSolver
+from transposition import TranspositionTable
+
+WIN_SCORE = 10000000
+
+class SearchTimeout(Exception):
+    """Поиск прерван: исчерпан бюджет времени или узлов"""
+
+# Состояние процесса-воркера параллельного поиска
+_worker_bot = None
+
+def _init_worker(settings):
+    global _worker_bot
+    config.__dict__.update(settings)
+    _worker_bot = GomokuBot(GomokuGame({}))
+
+def _search_root_move(history, move, depth, alpha, beta, deadline):
+    return _worker_bot.score_root_move(history, move, depth, alpha, beta, deadline)
 
 class GomokuBot:
-    def __init__(self, game):
+    def __init__(self, game, difficulty=None):
         self.game = game
-        self.difficulty = config.difficulty
-        
+        self.difficulty = difficulty or config.difficulty
+        # Таблица живет в игре и переиспользуется между ходами
+        self.tt = game.transposition_table
+        self.threat_solver = ThreatSolver(game)
+        self.nodes = 0
+        self.completed_depth = 0
+        self.best_move = None
+        self.best_score = None
+        # Оценка последнего хода make_move, если она известна
+        self.last_score = None
+        self.deadline = None
+        # Выставляется из другого потока, чтобы прервать поиск (см. BotThinker)
+        self.cancelled = False
+        # Пул воркеров создается при первом поиске и живет до конца партии
+        self.pool = None
+    
     def make_move(self):
+        self.last_score = None
+        self.nodes = 0
+        self.threat_solver.nodes = 0
+        self.completed_depth = 0
         if self.difficulty == 'easy':
             return self.easy_move()
         elif self.difficulty == 'medium':
@@ -16,6 +57,11 @@ class GomokuBot:
         else:
             return self.easy_move()  # fallback
     
+    @property
+    def total_nodes(self):
+        """Узлы поиска и решателя угроз за текущий ход"""
+        return self.nodes + self.threat_solver.nodes
+
     def easy_move(self):
         empty_cells = []
         for i in range(self.game.board_size):
@@ -48,8 +94,13 @@ class GomokuBot:
         return self.strategic_move()
     
     def hard_move(self):
+        book_move = self.find_book_move()
+        if book_move:
+            return book_move
+        
         winning_move = self.find_winning_move(self.game.current_player)
         if winning_move:
+            self.last_score = WIN_SCORE
             return winning_move
         
         opponent = 'black' if self.game.current_player == 'white' else 'white'
@@ -57,87 +108,331 @@ class GomokuBot:
         if blocking_move:
             return blocking_move
 
-        fork_move = self.find_fork_move()
-        if fork_move:
-            return fork_move
+        # Бюджет хода общий: решатель получает его часть, поиск - остаток
+        started = time.time()
+        self.deadline = started + config.search_time_ms / 1000.0
+        self.threat_solver.deadline = started + config.search_time_ms * config.threat_time_share / 1000.0
+        forced_move = self.threat_solver.find_vcf() or self.threat_solver.find_vct()
+        if forced_move:
+            self.last_score = WIN_SCORE
+            return forced_move
 
-        opponent_fork_block = self.block_opponent_fork()
-        if opponent_fork_block:
-            return opponent_fork_block
+        # None только без кандидатов, тогда ходить некуда и эвристикам
+        search_move = self.search_move(config.search_depth.get(self.difficulty, 1), self.deadline)
+        if search_move:
+            self.last_score = self.best_score
+        return search_move
+    
+    def find_book_move(self):
+        if not config.opening_book or self.game.move_count >= config.book_max_moves:
+            return None
+        return opening_book.get_book(self.game.board_size).lookup(self.game)
+    
+    def search_move(self, depth, deadline=None):
+        """Лучший ход по результатам negamax с альфа-бета отсечением.
+        
+        В режиме config.time_control глубина наращивается итеративно от 1
+        до depth (config.search_depth для сложности), пока не наступит
+        deadline (по умолчанию через config.search_time_ms); иначе поиск
+        идет сразу на глубину depth. При прерывании возвращается лучший
+        найденный к этому моменту ход.
+        """
+        player = self.game.current_player
+        moves = self.generate_moves(player)
+        if not moves:
+            return None
+        if len(moves) == 1:
+            # Единственный кандидат (например, центр пустой доски) искать незачем
+            self.best_move = moves[0]
+            self.best_score = None
+            return self.best_move
+        
+        self.nodes = 0
+        self.completed_depth = 0
+        self.deadline = deadline or time.time() + config.search_time_ms / 1000.0
+        self.tt.new_search()
+        
+        entry = self._tt_probe()
+        if entry:
+            moves = self._tt_move_first(moves, entry[3])
+        self.best_move = moves[0]
+        self.best_score = None
+        
+        if config.time_control:
+            depths = range(1, depth + 1)
+        else:
+            depths = [depth]
+        
+        try:
+            for current_depth in depths:
+                if config.search_workers > 1:
+                    score = self._parallel_search_root(moves, current_depth)
+                else:
+                    score = self._search_root(moves, current_depth)
+                self.completed_depth = current_depth
+                if abs(score) >= WIN_SCORE:
+                    break
+                # Лучший ход предыдущей итерации просматривается первым
+                moves = self._tt_move_first(moves, self.best_move)
+        except SearchTimeout:
+            pass
+        
+        return self.best_move
+    
+    def _search_root(self, moves, depth):
+        alpha = -WIN_SCORE * 2
+        beta = WIN_SCORE * 2
+        best_move = moves[0]
         
-        return self.advanced_evaluate_board()
+        for move in moves:
+            score = self._score_move(move, depth, alpha, beta)
+            
+            if score > alpha:
+                alpha = score
+                best_move = move
+                self.best_move = move
+                self.best_score = score
+        
+        self._tt_store(depth, alpha, TranspositionTable.EXACT, best_move)
+        return alpha
+    
+    def _parallel_search_root(self, moves, depth):
+        """Корневые ходы делятся между воркерами пула (PVS на корне).
+        
+        Первый ход (лучший по прошлой итерации) считается здесь с полным
+        окном и дает alpha. Остальные воркеры проверяют нулевым окном
+        (alpha, alpha + 1): ход, не превысивший alpha, не выбрал бы и
+        однопоточный поиск. Превысившие alpha пересчитываются с окном
+        (alpha, beta) и выбирается первый по порядку ход с максимальной
+        оценкой - тот же, что при однопоточном поиске той же глубины.
+        """
+        beta = WIN_SCORE * 2
+        alpha = self._score_move(moves[0], depth, -beta, beta)
+        best_move = moves[0]
+        self.best_move = best_move
+        self.best_score = alpha
+        
+        rest = moves[1:]
+        scores = self._score_in_pool(rest, depth, alpha, alpha + 1)
+        failed_high = [move for move, score in zip(rest, scores) if score > alpha]
+        if failed_high:
+            # Ход, превысивший alpha, заведомо лучше первого, даже если пересчет не успеет
+            self.best_move = failed_high[0]
+            for move, score in zip(failed_high, self._score_in_pool(failed_high, depth, alpha, beta)):
+                if score > alpha:
+                    alpha = score
+                    best_move = move
+        
+        self.best_move = best_move
+        self.best_score = alpha
+        self._tt_store(depth, alpha, TranspositionTable.EXACT, best_move)
+        return alpha
+    
+    def _score_in_pool(self, moves, depth, alpha, beta):
+        """Оценки ходов с окном (alpha, beta) в воркерах; SearchTimeout, если
+        хотя бы один ход не досчитан"""
+        if not moves:
+            return []
+        history = self.game.get_history()
+        tasks = [(history, move, depth, alpha, beta, self.deadline) for move in moves]
+        results = self.start_pool().starmap(_search_root_move, tasks, chunksize=1)
+        
+        self.nodes += sum(nodes for _, nodes in results)
+        if any(score is None for score, _ in results):
+            raise SearchTimeout()
+        return [score for score, _ in results]
+    
+    def score_root_move(self, history, move, depth, alpha, beta, deadline):
+        """Оценка одного корневого хода с окном (alpha, beta) (выполняется в воркере)"""
+        self._sync_position(history)
+        self.nodes = 0
+        self.deadline = deadline
+        if time.time() >= deadline:
+            return None, 0
+        
+        try:
+            score = self._score_move(move, depth, alpha, beta)
+        except SearchTimeout:
+            score = None
+        
+        return score, self.nodes
+    
+    def _sync_position(self, history):
+        """Приводит партию воркера к history, сохраняя его таблицу транспозиций"""
+        if self.game.sync_history(history):
+            self.tt.new_search()
+    
+    def start_pool(self):
+        """Пул воркеров параллельного поиска (создается один раз).
+        
+        Вызывать из главного потока: fork процесса, в котором уже работают
+        другие потоки (например, поток BotThinker), небезопасен.
+        """
+        if self.pool is None:
+            settings = dict(vars(config))
+            settings['board_size'] = self.game.board_size
+            self.pool = multiprocessing.Pool(config.search_workers, _init_worker, (settings,))
+        return self.pool
+    
+    def close(self):
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+    
+    def negamax(self, depth, alpha, beta):
+        player = self.game.current_player
+        self.nodes += 1
+        self._check_budget()
+        
+        if depth <= 0:
+            return self.evaluate_board(player)
+        
+        tt_move = None
+        entry = self._tt_probe()
+        if entry:
+            entry_depth, entry_score, entry_flag, tt_move = entry
+            if entry_depth >= depth:
+                if entry_flag == TranspositionTable.EXACT:
+                    return entry_score
+                elif entry_flag == TranspositionTable.LOWER:
+                    alpha = max(alpha, entry_score)
+                else:
+                    beta = min(beta, entry_score)
+                if alpha >= beta:
+                    return entry_score
+        
+        moves = self.generate_moves(player)
+        if not moves:
+            return 0
+        if tt_move:
+            moves = self._tt_move_first(moves, tt_move)
+        
+        alpha_orig = alpha
+        best_score = -WIN_SCORE * 2
+        best_move = None
+        
+        for move in moves:
+            score = self._score_move(move, depth, alpha, beta)
+            
+            if score > best_score:
+                best_score = score
+                best_move = move
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                break
+        
+        if best_score <= alpha_orig:
+            flag = TranspositionTable.UPPER
+        elif best_score >= beta:
+            flag = TranspositionTable.LOWER
+        else:
+            flag = TranspositionTable.EXACT
+        self._tt_store(depth, best_score, flag, best_move)
+        
+        return best_score
+    
+    def _tt_probe(self):
+        """Запись таблицы для текущей позиции с ходом в ее собственной ориентации.
+        
+        Таблица хранит позиции под каноническим ключом, так что повороты
+        и отражения уже посчитанной позиции тоже находятся.
+        """
+        key, symmetry = self.game.canonical_key()
+        entry = self.tt.probe(key)
+        if entry and entry[3]:
+            return entry[:3] + (self.game.from_canonical(entry[3], symmetry),)
+        return entry
+    
+    def _tt_store(self, depth, score, flag, move):
+        key, symmetry = self.game.canonical_key()
+        if move:
+            move = self.game.to_canonical(move, symmetry)
+        self.tt.store(key, depth, score, flag, move)
+    
+    def _tt_move_first(self, moves, tt_move):
+        if tt_move is None or self.game.board[tt_move[0]][tt_move[1]] is not None:
+            return moves
+        return [tt_move] + [move for move in moves if move != tt_move]
+    
+    def _check_budget(self):
+        # Узел стоит сотни микросекунд (generate_moves оценивает всех
+        # кандидатов), так что часы проверяются на каждом
+        if self.nodes >= config.search_node_limit or self.cancelled or time.time() >= self.deadline:
+            raise SearchTimeout()
+    
+    def _score_move(self, move, depth, alpha, beta):
+        """Оценка хода с точки зрения сделавшей его стороны"""
+        self.game.push(move)
+        try:
+            if self.game.game_over:
+                return WIN_SCORE + depth if self.game.winner else 0
+            return -self.negamax(depth - 1, -beta, -alpha)
+        finally:
+            self.game.pop()
+    
+    def generate_moves(self, player):
+        """Пустые клетки рядом с камнями, отсортированные по быстрой оценке"""
+        opponent = 'black' if player == 'white' else 'white'
+        candidates = self.game.get_candidates()
+        if len(candidates) <= 1:
+            return candidates
+        
+        scored = []
+        for i, j in candidates:
+            score = self.evaluate_position(i, j, player) * 2 + self.evaluate_position(i, j, opponent)
+            scored.append((-score, (i, j)))
+        scored.sort()
+        
+        return [move for _, move in scored[:config.search_width]]
+    
+    def evaluate_board(self, player):
+        """Статическая оценка позиции с точки зрения player"""
+        return self.game.evaluator.evaluate(player)
     
     def find_winning_move(self, player):
-        for i in range(self.game.board_size):
-            for j in range(self.game.board_size):
-                if self.game.board[i][j] is None:
-                    self.game.board[i][j] = player
-                    if self.game.check_win(i, j):
-                        self.game.board[i][j] = None
-                        return (i, j)
-                    self.game.board[i][j] = None
-        return None
+        winning_cells = self.game.winning_cells(player)
+        return winning_cells[0] if winning_cells else None
     
     def find_threat_move(self, player, length=4):
-        for i in range(self.game.board_size):
-            for j in range(self.game.board_size):
-                if self.game.board[i][j] is None:
-                    if self.check_potential_line(player, i, j, length):
-                        return (i, j)
+        for i, j in self.game.get_candidates():
+            if self.check_potential_line(player, i, j, length):
+                return (i, j)
         return None
     
     def check_potential_line(self, player, row, col, target_length):
-        directions = [(1, 0), (0, 1), (1, 1), (1, -1)]
-        
-        for dx, dy in directions:
-            count = 0
-            gaps = 0
-            
-            for direction in [1, -1]:
-                consecutive = True
-                for step in range(1, target_length):
-                    r = row + dx * step * direction
-                    c = col + dy * step * direction
-                    
-                    if not (0 <= r < self.game.board_size and 0 <= c < self.game.board_size):
-                        consecutive = False
-                        break
-                    
-                    if self.game.board[r][c] == player:
-                        count += 1
-                    elif self.game.board[r][c] is None:
-                        gaps += 1
-                        if gaps > 1:
-                            consecutive = False
-                            break
-                    else:
-                        consecutive = False
-                        break
-                
-                if not consecutive:
-                    break
-            
-            if count >= target_length - 1 and gaps <= 2:
+        """Дает ли камень в (row, col) target_length своих камней в свободной пятерке.
+        
+        Свободная пятерка - пять клеток подряд через (row, col) без чужих
+        камней и края доски. Разорванные формы (B.BB* и BB*.B) считаются,
+        серии, которым не хватает места на пятерку (|*BBBX), - нет.
+        """
+        for direction in range(4):
+            if patterns.lookup(self.game, row, col, direction, player)[1] >= target_length:
                 return True
         
         return False
     
     def strategic_move(self):
+        if self.game.heatmap:
+            opponent = 'black' if self.game.current_player == 'white' else 'white'
+            weights = self.game.heatmap.strategic_weights(self.game.current_player, opponent)
+            return self.game.heatmap.best(weights, self.game.get_candidates())
+        
         empty_cells = []
         center = self.game.board_size // 2
         
-        for i in range(self.game.board_size):
-            for j in range(self.game.board_size):
-                if self.game.board[i][j] is None:
-                    # Базовый вес на основе позиции
-                    weight = 0
-                    
-                    distance_to_center = abs(i - center) + abs(j - center)
-                    weight += (self.game.board_size - distance_to_center) * 2                    
-                    weight += self.evaluate_position(i, j, self.game.current_player) * 3                    
-                    opponent = 'black' if self.game.current_player == 'white' else 'white'
-                    weight += self.evaluate_position(i, j, opponent) * 2                    
-                    empty_cells.append(((i, j), weight))
+        for i, j in self.game.get_candidates():
+            # Базовый вес на основе позиции
+            weight = 0
+            
+            distance_to_center = abs(i - center) + abs(j - center)
+            weight += (self.game.board_size - distance_to_center) * 2                    
+            weight += self.evaluate_position(i, j, self.game.current_player) * 3                    
+            opponent = 'black' if self.game.current_player == 'white' else 'white'
+            weight += self.evaluate_position(i, j, opponent) * 2                    
+            empty_cells.append(((i, j), weight))
         
         if not empty_cells:
             return None
@@ -172,196 +467,4 @@ class GomokuBot:
             if line_score >= 2:
                 score += line_score * line_score
         
-        return score
-    
-    def find_fork_move(self):
-        opponent = 'black' if self.game.current_player == 'white' else 'white'
-        best_fork = None
-        best_fork_score = 0
-        
-        for i in range(self.game.board_size):
-            for j in range(self.game.board_size):
-                if self.game.board[i][j] is None:
-                    fork_score = self.calculate_fork_potential(i, j)
-                    
-                    if fork_score > best_fork_score:
-                        best_fork_score = fork_score
-                        best_fork = (i, j)
-        
-        return best_fork if best_fork_score >= 2 else None
-    
-    def calculate_fork_potential(self, row, col):
-        threats = 0
-        directions = [(1, 0), (0, 1), (1, 1), (1, -1)]
-        self.game.board[row][col] = self.game.current_player
-
-        for dx, dy in directions:
-            for direction in [1, -1]:
-                if self.check_direction_potential(row, col, dx, dy, direction, 4):
-                    threats += 1
-                    if threats >= 2:
-                        self.game.board[row][col] = None
-                        return threats
-        
-        self.game.board[row][col] = None
-        return threats
-    
-    def check_direction_potential(self, row, col, dx, dy, direction, length):
-        count = 1
-        
-        for step in range(1, length):
-            r = row + dx * step * direction
-            c = col + dy * step * direction
-            
-            if not (0 <= r < self.game.board_size and 0 <= c < self.game.board_size):
-                return False
-            
-            if self.game.board[r][c] == self.game.current_player:
-                count += 1
-            elif self.game.board[r][c] is not None:
-                return False
-        
-        return count >= length - 1
-    
-    def block_opponent_fork(self):
-        opponent = 'black' if self.game.current_player == 'white' else 'white'
-        fork_blocks = []
-        
-        for i in range(self.game.board_size):
-            for j in range(self.game.board_size):
-                if self.game.board[i][j] is None:
-                    self.game.board[i][j] = opponent
-                    fork_score = self.calculate_fork_potential(i, j)
-                    self.game.board[i][j] = None
-                    
-                    if fork_score >= 2:
-                        fork_blocks.append((i, j))
-        
-        return random.choice(fork_blocks) if fork_blocks else None
-    
-    def advanced_evaluate_board(self):
-        empty_cells = []
-        
-        for i in range(self.game.board_size):
-            for j in range(self.game.board_size):
-                if self.game.board[i][j] is None:
-                    score = self.cell_score(i, j)
-                    empty_cells.append(((i, j), score))
-        
-        if not empty_cells:
-            return None
-            
-        empty_cells.sort(key=lambda x: x[1], reverse=True)
-        if len(empty_cells) > 3 and random.random() < 0.1:
-            return empty_cells[random.randint(1, 3)][0]
-        
-        return empty_cells[0][0]
-    
-    def cell_score(self, row, col):
-        score = 0
-        center = self.game.board_size // 2
-        distance = abs(row - center) + abs(col - center)
-        score += (self.game.board_size * 2 - distance) * 10
-        score += self.evaluate_patterns(row, col, self.game.current_player) * 100
-        opponent = 'black' if self.game.current_player == 'white' else 'white'
-        score += self.evaluate_patterns(row, col, opponent) * 80
-        score += self.evaluate_line_potential(row, col) * 50
-        
-        return score
-    
-    def evaluate_patterns(self, row, col, player):
-        patterns = {
-            'five': 100000,      
-            'open_four': 10000,  
-            'four': 1000,        
-            'open_three': 500,   
-            'three': 200,        
-            'open_two': 50,      
-            'two': 10           
-        }
-        
-        total_score = 0
-        directions = [(1, 0), (0, 1), (1, 1), (1, -1)]
-        
-        for dx, dy in directions:
-            for direction in [1, -1]:
-                pattern_score = self.analyze_direction(row, col, dx, dy, direction, player, patterns)
-                total_score += pattern_score
-        
-        return total_score
-    
-    def analyze_direction(self, row, col, dx, dy, direction, player, patterns):
-        self.game.board[row][col] = player
-        
-        count = 1
-        open_ends = 0
-
-        for step in range(1, 6):
-            r = row + dx * step * direction
-            c = col + dy * step * direction
-            
-            if not (0 <= r < self.game.board_size and 0 <= c < self.game.board_size):
-                break
-            
-            if self.game.board[r][c] == player:
-                count += 1
-            elif self.game.board[r][c] is None:
-                open_ends += 1
-                break
-            else:
-                break
-        
-        for step in range(1, 6):
-            r = row - dx * step * direction
-            c = col - dy * step * direction
-            
-            if not (0 <= r < self.game.board_size and 0 <= c < self.game.board_size):
-                break
-            
-            if self.game.board[r][c] == player:
-                count += 1
-            elif self.game.board[r][c] is None:
-                open_ends += 1
-                break
-            else:
-                break
-        
-        self.game.board[row][col] = None
-        if count >= 5:
-            return patterns['five']
-        elif count == 4:
-            return patterns['open_four'] if open_ends >= 2 else patterns['four']
-        elif count == 3:
-            return patterns['open_three'] if open_ends >= 2 else patterns['three']
-        elif count == 2:
-            return patterns['open_two'] if open_ends >= 2 else patterns['two']
-        
-        return 0
-    
-    def evaluate_line_potential(self, row, col):
-        potential = 0
-        directions = [(1, 0), (0, 1), (1, 1), (1, -1)]
-        
-        for dx, dy in directions:
-            space = self.check_available_space(row, col, dx, dy)
-            potential += space * 5
-        
-        return potential
-    
-    def check_available_space(self, row, col, dx, dy):
-        space = 0
-        
-        for direction in [1, -1]:
-            for step in range(1, 6):
-                r = row + dx * step * direction
-                c = col + dy * step * direction
-                
-                if not (0 <= r < self.game.board_size and 0 <= c < self.game.board_size):
-                    break
-                
-                if self.game.board[r][c] is None:
-                    space += 1
-                else:
-                    break
-        
-        return space
\ No newline at end of file
+        return score
\ No newline at end of file
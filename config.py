@@ -10,6 +10,29 @@ class Config:
         self.black_color = "blue"
         self.white_color = "red"
         self.search_depth = {"easy": 1, "medium": 2, "hard": 4}
+        self.search_width = 12
+        self.search_node_limit = 200000
+        self.search_time_ms = 2000
+        self.time_control = True
+        self.search_workers = 1
+        self.vcf_depth = 12
+        self.vct_depth = 4
+        self.threat_node_limit = 20000
+        # Доля search_time_ms, которую может занять поиск VCF/VCT
+        self.threat_time_share = 0.25
+        self.threat_cache_size = 100000
+        self.tt_size = 1 << 16
+        self.candidate_radius = 2
+        self.use_bitboard = True
+        # Векторная оценка доски, если установлен NumPy
+        self.use_numpy = True
+        # Дебютная книга: файлы book_dir/opening_<размер>.bin
+        self.opening_book = True
+        self.book_dir = 'books'
+        self.book_max_moves = 8
+        # Поиск ответов на вероятные ходы игрока, пока он думает
+        self.ponder = True
+        self.ponder_moves = 3
         
     def load_config(self):
         try:
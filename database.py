@@ -1,85 +1,364 @@
 import json
 import os
-from datetime import datetime
+import sqlite3
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from recording import GameRecord
+
+# Миграции схемы по порядку; PRAGMA user_version - число примененных
+MIGRATIONS = [
+    [
+        """CREATE TABLE games (
+               id INTEGER PRIMARY KEY,
+               date TEXT NOT NULL,
+               result TEXT NOT NULL,
+               difficulty TEXT,
+               board_size INTEGER
+           )""",
+        """CREATE TABLE summary (
+               id INTEGER PRIMARY KEY CHECK (id = 1),
+               total_games INTEGER NOT NULL DEFAULT 0,
+               wins INTEGER NOT NULL DEFAULT 0,
+               losses INTEGER NOT NULL DEFAULT 0,
+               draws INTEGER NOT NULL DEFAULT 0,
+               win_streak INTEGER NOT NULL DEFAULT 0,
+               max_win_streak INTEGER NOT NULL DEFAULT 0
+           )""",
+        "INSERT INTO summary (id) VALUES (1)"
+    ],
+    [
+        # Ходы лежат отдельно, чтобы таблица games оставалась узкой для статистики
+        "ALTER TABLE games ADD COLUMN player_color TEXT",
+        "ALTER TABLE games ADD COLUMN move_count INTEGER",
+        """CREATE TABLE game_records (
+               game_id INTEGER PRIMARY KEY REFERENCES games (id),
+               moves BLOB NOT NULL,
+               timings BLOB
+           )"""
+    ],
+    [
+        "CREATE INDEX games_date ON games (date)",
+        "CREATE INDEX games_filters ON games (difficulty, board_size, player_color)",
+        # Счетчики по дням и условиям партии, обновляются при каждой записи результата.
+        # Неизвестные значения хранятся как '' и 0, чтобы работал первичный ключ.
+        """CREATE TABLE game_aggregates (
+               day TEXT NOT NULL,
+               difficulty TEXT NOT NULL,
+               board_size INTEGER NOT NULL,
+               player_color TEXT NOT NULL,
+               games INTEGER NOT NULL DEFAULT 0,
+               wins INTEGER NOT NULL DEFAULT 0,
+               losses INTEGER NOT NULL DEFAULT 0,
+               draws INTEGER NOT NULL DEFAULT 0,
+               recorded_games INTEGER NOT NULL DEFAULT 0,
+               total_moves INTEGER NOT NULL DEFAULT 0,
+               PRIMARY KEY (day, difficulty, board_size, player_color)
+           )""",
+        """INSERT INTO game_aggregates
+           SELECT substr(date, 1, 10), COALESCE(difficulty, ''), COALESCE(board_size, 0), COALESCE(player_color, ''),
+                  COUNT(*), SUM(result = 'win'), SUM(result = 'loss'), SUM(result = 'draw'),
+                  COUNT(move_count), COALESCE(SUM(move_count), 0)
+           FROM games GROUP BY 1, 2, 3, 4"""
+    ],
+    [
+        # Отметки разовых операций (перенос stats.json), в одной транзакции с ними
+        "CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)"
+    ]
+]
+
+# Сколько ждать блокировки базы, занятой другим процессом
+BUSY_TIMEOUT = 30.0
+
+# Поля, по которым можно группировать query_stats
+GROUP_FIELDS = ('difficulty', 'board_size', 'player_color', 'day')
+
+def _day(value):
+    """date/datetime или строка ISO -> 'YYYY-MM-DD'"""
+    return str(value)[:10]
+
+def _stats_row(games, wins, losses, draws, recorded_games, total_moves):
+    return {
+        "total_games": games,
+        "wins": wins,
+        "losses": losses,
+        "draws": draws,
+        "win_rate": round(wins / games * 100, 1) if games else 0,
+        "avg_moves": round(total_moves / recorded_games, 1) if recorded_games else None
+    }
+
+SCHEMA_VERSION = len(MIGRATIONS)
 
 class Database:
+    """История партий в SQLite.
+
+    Каждая партия - одна строка таблицы games, запись результата - один
+    INSERT и обновление единственной строки summary с итоговыми счетчиками.
+    История хранится целиком, вместе с записью ходов (game_records).
+    Старый stats.json переносится при первом запуске.
+
+    База работает в режиме WAL: запись атомарна и переживает падение
+    процесса, читатели не блокируют писателя, а несколько процессов
+    (например, воркеры self-play) пишут по очереди, ожидая блокировку
+    до BUSY_TIMEOUT секунд. Много результатов подряд можно записать одной
+    транзакцией через transaction().
+    """
+
     def __init__(self):
+        self.db_file = 'stats.db'
         self.stats_file = 'stats.json'
-        self._init_stats()
-        
-    def _init_stats(self):
+        self.connection = None
+        self.pid = None
+        self.in_transaction = False
+
+    def _connect(self):
+        # Соединение SQLite нельзя переносить в дочерний процесс после fork
+        if self.connection is not None and self.pid != os.getpid():
+            self.connection = None
+        if self.connection is None:
+            # isolation_level=None: транзакции открываются явно в transaction()
+            connection = sqlite3.connect(self.db_file, timeout=BUSY_TIMEOUT, isolation_level=None)
+            connection.execute("PRAGMA journal_mode = WAL")
+            connection.execute("PRAGMA synchronous = NORMAL")
+            self.connection = connection
+            self.pid = os.getpid()
+            self.in_transaction = False
+            self._init_schema()
+            self._migrate_legacy_stats()
+        return self.connection
+
+    @contextmanager
+    def transaction(self):
+        """Транзакция с блокировкой на запись; вложенные вызовы входят во внешнюю.
+
+        with database.transaction():
+            for result in results:
+                database.add_game_result(...)
+        """
+        connection = self._connect()
+        if self.in_transaction:
+            yield connection
+            return
+
+        connection.execute("BEGIN IMMEDIATE")
+        self.in_transaction = True
+        try:
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        else:
+            connection.execute("COMMIT")
+        finally:
+            self.in_transaction = False
+
+    def _init_schema(self):
+        with self.transaction():
+            # Версия читается под блокировкой: схему мог обновить другой процесс
+            version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+            if version > SCHEMA_VERSION:
+                raise RuntimeError(f"{self.db_file} was created by a newer version (schema {version})")
+            for statements in MIGRATIONS[version:]:
+                for statement in statements:
+                    self.connection.execute(statement)
+            self.connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _migrate_legacy_stats(self):
+        """Переносит счетчики и сохраненные партии из stats.json.
+
+        Отметка в meta пишется в той же транзакции, поэтому после падения
+        между переносом и переименованием файла партии не задвоятся. Если
+        файл поврежден, он остается на месте, а статистика не сбрасывается.
+        """
         if not os.path.exists(self.stats_file):
-            default_stats = {
-                "total_games": 0,
-                "wins": 0,
-                "losses": 0,
-                "draws": 0,
-                "win_streak": 0,
-                "max_win_streak": 0,
-                "games": []
-            }
-            self._save_stats(default_stats)
-    
-    def _load_stats(self):
+            return
         try:
             with open(self.stats_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except:
-            self._init_stats()
-            return self._load_stats()
-    
-    def _save_stats(self, stats):
+                stats = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error loading stats: {e}")
+            return
+
+        with self.transaction():
+            if not self.connection.execute("SELECT 1 FROM meta WHERE key = 'legacy_stats_migrated'").fetchone():
+                self._import_legacy_stats(stats)
+
         try:
-            with open(self.stats_file, 'w', encoding='utf-8') as f:
-                json.dump(stats, f, indent=4, ensure_ascii=False)
-        except Exception as e:
-            print(f"Error saving stats: {e}")
-    
-    def add_game_result(self, result, difficulty, board_size):
-        """Result: 'win', 'loss', 'draw'"""
-        stats = self._load_stats()
-        
-        stats["total_games"] += 1
-        
-        if result == "win":
-            stats["wins"] += 1
-            stats["win_streak"] += 1
-            stats["max_win_streak"] = max(stats["max_win_streak"], stats["win_streak"])
-        elif result == "loss":
-            stats["losses"] += 1
-            stats["win_streak"] = 0
-        elif result == "draw":
-            stats["draws"] += 1
-            stats["win_streak"] = 0
-        
-        game_record = {
-            "date": datetime.now().isoformat(),
-            "result": result,
-            "difficulty": difficulty,
-            "board_size": board_size
-        }
-        stats["games"].append(game_record)
-        
-        if len(stats["games"]) > 100:
-            stats["games"] = stats["games"][-100:]
-        
-        self._save_stats(stats)
-    
+            # Переименование - признак того, что файл уже перенесен
+            os.replace(self.stats_file, self.stats_file + '.migrated')
+        except OSError as e:
+            print(f"Error renaming {self.stats_file}: {e}")
+
+    def _import_legacy_stats(self, stats):
+        for game in stats.get("games", []):
+            self._insert_game(game.get("date", ""), game.get("result", ""), game.get("difficulty"), game.get("board_size"))
+        self.connection.execute(
+            """UPDATE summary SET total_games = total_games + ?, wins = wins + ?, losses = losses + ?,
+               draws = draws + ?, win_streak = ?, max_win_streak = MAX(max_win_streak, ?) WHERE id = 1""",
+            (stats.get("total_games", 0), stats.get("wins", 0), stats.get("losses", 0),
+             stats.get("draws", 0), stats.get("win_streak", 0), stats.get("max_win_streak", 0))
+        )
+        self.connection.execute(
+            "INSERT INTO meta (key, value) VALUES ('legacy_stats_migrated', ?)", (datetime.now().isoformat(),)
+        )
+
+    def add_game_result(self, result, difficulty, board_size, player_color=None, record=None):
+        """Result: 'win', 'loss', 'draw'; record - GameRecord партии. Возвращает id партии"""
+        with self.transaction() as connection:
+            game_id = self._insert_game(datetime.now().isoformat(), result, difficulty, board_size, player_color, record)
+            connection.execute(
+                """UPDATE summary SET
+                       total_games = total_games + 1,
+                       wins = wins + (:result = 'win'),
+                       losses = losses + (:result = 'loss'),
+                       draws = draws + (:result = 'draw'),
+                       win_streak = CASE WHEN :result = 'win' THEN win_streak + 1 ELSE 0 END,
+                       max_win_streak = MAX(max_win_streak, CASE WHEN :result = 'win' THEN win_streak + 1 ELSE 0 END)
+                   WHERE id = 1""",
+                {"result": result}
+            )
+        return game_id
+
+    def _insert_game(self, played_at, result, difficulty, board_size, player_color=None, record=None):
+        """Строка games, запись ходов и счетчики game_aggregates; вызывается внутри транзакции"""
+        move_count = len(record) if record else None
+        game_id = self.connection.execute(
+            "INSERT INTO games (date, result, difficulty, board_size, player_color, move_count) VALUES (?, ?, ?, ?, ?, ?)",
+            (played_at, result, difficulty, board_size, player_color, move_count)
+        ).lastrowid
+        if record:
+            moves, timings = record.pack()
+            self.connection.execute(
+                "INSERT INTO game_records (game_id, moves, timings) VALUES (?, ?, ?)",
+                (game_id, moves, timings)
+            )
+        self.connection.execute(
+            """INSERT INTO game_aggregates VALUES (:day, :difficulty, :board_size, :player_color,
+                   1, :result = 'win', :result = 'loss', :result = 'draw', :move_count IS NOT NULL, COALESCE(:move_count, 0))
+               ON CONFLICT (day, difficulty, board_size, player_color) DO UPDATE SET
+                   games = games + 1,
+                   wins = wins + (:result = 'win'),
+                   losses = losses + (:result = 'loss'),
+                   draws = draws + (:result = 'draw'),
+                   recorded_games = recorded_games + (:move_count IS NOT NULL),
+                   total_moves = total_moves + COALESCE(:move_count, 0)""",
+            {"day": _day(played_at), "difficulty": difficulty or '', "board_size": board_size or 0,
+             "player_color": player_color or '', "result": result, "move_count": move_count}
+        )
+        return game_id
+
+    def _filters(self, difficulty=None, board_size=None, player_color=None, date_from=None, date_to=None, by_day=True):
+        """WHERE-условие и параметры; date_from и date_to включительно.
+
+        by_day - фильтр по столбцу day таблицы game_aggregates, иначе по
+        полной дате в games (так используется индекс games_date).
+        """
+        conditions = []
+        params = []
+        for column, value in (("difficulty", difficulty), ("board_size", board_size), ("player_color", player_color)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        if date_from is not None:
+            conditions.append("day >= ?" if by_day else "date >= ?")
+            params.append(_day(date_from))
+        if date_to is not None:
+            if by_day:
+                conditions.append("day <= ?")
+                params.append(_day(date_to))
+            else:
+                conditions.append("date < ?")
+                params.append((date.fromisoformat(_day(date_to)) + timedelta(days=1)).isoformat())
+        return (" WHERE " + " AND ".join(conditions)) if conditions else "", params
+
+    def query_stats(self, group_by=None, **filters):
+        """Победы, процент побед и средняя длина партии по сохраненной истории.
+
+        Фильтры: difficulty, board_size, player_color, date_from, date_to.
+        group_by - одно из GROUP_FIELDS; тогда результат - словарь
+        {значение: статистика}. Считается по game_aggregates, так что
+        время не зависит от числа партий.
+        """
+        if group_by is not None and group_by not in GROUP_FIELDS:
+            raise ValueError(f"Unknown group field: {group_by}")
+        where, params = self._filters(**filters)
+        columns = "SUM(games), SUM(wins), SUM(losses), SUM(draws), SUM(recorded_games), SUM(total_moves)"
+        connection = self._connect()
+
+        if group_by is None:
+            row = connection.execute(f"SELECT {columns} FROM game_aggregates{where}", params).fetchone()
+            return _stats_row(*(value or 0 for value in row))
+
+        rows = connection.execute(
+            f"SELECT {group_by}, {columns} FROM game_aggregates{where} GROUP BY {group_by} ORDER BY {group_by}", params
+        ).fetchall()
+        return {row[0]: _stats_row(*row[1:]) for row in rows}
+
+    def get_streaks(self, window=None, **filters):
+        """Текущая и максимальная серия побед среди последних window партий (или всех),
+        отобранных теми же фильтрами, что и в query_stats"""
+        where, params = self._filters(by_day=False, **filters)
+        query = f"SELECT result FROM games{where} ORDER BY id DESC"
+        if window is not None:
+            query += " LIMIT ?"
+            params.append(window)
+
+        current = 0
+        best = 0
+        run = 0
+        counting_current = True
+        for (result,) in self._connect().execute(query, params):
+            if result == 'win':
+                run += 1
+                best = max(best, run)
+            else:
+                run = 0
+                counting_current = False
+            if counting_current:
+                current = run
+        return {"win_streak": current, "max_win_streak": best}
+
+    def get_game_record(self, game_id):
+        """GameRecord сохраненной партии или None, если ходы не записаны"""
+        row = self._connect().execute(
+            """SELECT games.board_size, game_records.moves, game_records.timings
+               FROM game_records JOIN games ON games.id = game_records.game_id
+               WHERE game_records.game_id = ?""",
+            (game_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return GameRecord.unpack(*row)
+
+    def replay(self, game_id, move_number=None):
+        """Позиция партии game_id после move_number ходов, без запуска бота"""
+        record = self.get_game_record(game_id)
+        if record is None:
+            raise KeyError(f"No move record for game {game_id}")
+        return record.replay(move_number)
+
     def get_stats(self):
-        stats = self._load_stats()
-        if stats["total_games"] > 0:
-            win_rate = (stats["wins"] / stats["total_games"]) * 100
+        row = self._connect().execute(
+            "SELECT total_games, wins, losses, draws, win_streak, max_win_streak FROM summary WHERE id = 1"
+        ).fetchone()
+        total_games, wins, losses, draws, win_streak, max_win_streak = row
+        if total_games > 0:
+            win_rate = (wins / total_games) * 100
         else:
             win_rate = 0
-            
+
         return {
-            "total_games": stats["total_games"],
-            "wins": stats["wins"],
-            "losses": stats["losses"],
-            "draws": stats["draws"],
+            "total_games": total_games,
+            "wins": wins,
+            "losses": losses,
+            "draws": draws,
             "win_rate": round(win_rate, 1),
-            "win_streak": stats["win_streak"],
-            "max_win_streak": stats["max_win_streak"]
+            "win_streak": win_streak,
+            "max_win_streak": max_win_streak
         }
 
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
 database = Database()
\ No newline at end of file
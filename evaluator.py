@@ -0,0 +1,97 @@
+PATTERN_SCORES = {
+    'five': 100000,
+    'open_four': 10000,
+    'four': 1000,
+    'open_three': 500,
+    'three': 200,
+    'open_two': 50,
+    'two': 10
+}
+
+def run_score(count, open_ends):
+    if count >= 5:
+        return PATTERN_SCORES['five']
+    if open_ends == 0:
+        return 0
+    if count == 4:
+        return PATTERN_SCORES['open_four'] if open_ends >= 2 else PATTERN_SCORES['four']
+    elif count == 3:
+        return PATTERN_SCORES['open_three'] if open_ends >= 2 else PATTERN_SCORES['three']
+    elif count == 2:
+        return PATTERN_SCORES['open_two'] if open_ends >= 2 else PATTERN_SCORES['two']
+
+    return 0
+
+def score_line(values, player):
+    """Сумма оценок всех серий камней player в линии"""
+    score = 0
+    count = 0
+    open_start = False
+
+    for cell in values:
+        if cell == player:
+            count += 1
+            continue
+        if count:
+            score += run_score(count, open_start + (cell is None))
+            count = 0
+        open_start = cell is None
+
+    if count:
+        score += run_score(count, open_start)
+
+    return score
+
+class LineEvaluator:
+    """Кеш оценок по линиям доски.
+
+    Для каждой строки, столбца и диагонали длиной от пяти клеток хранится
+    оценка обоих цветов. После постановки или снятия камня пересчитываются
+    только (не более) четыре линии через эту клетку.
+    """
+
+    def __init__(self, game):
+        self.game = game
+        self.lines = self._precalculate_lines(game.board_size)
+        self.cell_lines = [[[] for _ in range(game.board_size)] for _ in range(game.board_size)]
+        for index, line in enumerate(self.lines):
+            for r, c in line:
+                self.cell_lines[r][c].append(index)
+        self.reset()
+
+    def _precalculate_lines(self, size):
+        """Все линии доски (строки, столбцы, диагонали), на которых помещается пять камней"""
+        lines = []
+
+        for i in range(size):
+            lines.append([(i, j) for j in range(size)])
+            lines.append([(j, i) for j in range(size)])
+
+        for start in range(-(size - 5), size - 4):
+            lines.append([(i, i - start) for i in range(size) if 0 <= i - start < size])
+            lines.append([(i, start + size - 1 - i) for i in range(size) if 0 <= start + size - 1 - i < size])
+
+        return [line for line in lines if len(line) >= 5]
+
+    def reset(self):
+        self.scores = {'black': [0] * len(self.lines), 'white': [0] * len(self.lines)}
+        self.totals = {'black': 0, 'white': 0}
+        for index in range(len(self.lines)):
+            self._rescore(index)
+
+    def _rescore(self, index):
+        board = self.game.board
+        values = [board[r][c] for r, c in self.lines[index]]
+        for player in ('black', 'white'):
+            score = score_line(values, player)
+            self.totals[player] += score - self.scores[player][index]
+            self.scores[player][index] = score
+
+    def update(self, row, col):
+        for index in self.cell_lines[row][col]:
+            self._rescore(index)
+
+    def evaluate(self, player):
+        """Оценка позиции с точки зрения player"""
+        opponent = 'black' if player == 'white' else 'white'
+        return self.totals[player] - self.totals[opponent]
\ No newline at end of file
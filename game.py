@@ -1,8 +1,47 @@
+import random
+import sys
+import time
 from config import config
+from bitboard import BitBoard
+from evaluator import LineEvaluator
+import heatmap
+from transposition import TranspositionTable
+
+# Фиксированное зерно: ключи одинаковы во всех процессах и между запусками
+ZOBRIST_SEED = 0x5EED
+
+def _zobrist_keys(board_size):
+    rng = random.Random(ZOBRIST_SEED + board_size)
+    return {
+        player: [[rng.getrandbits(64) for _ in range(board_size)] for _ in range(board_size)]
+        for player in ('black', 'white')
+    }
+
+# Симметрии доски (группа диэдра): транспонирование (бит 4), затем
+# отражение строк (бит 1) и столбцов (бит 2); 0 - тождественная
+SYMMETRIES = range(8)
+
+def transform(row, col, symmetry, size):
+    if symmetry & 4:
+        row, col = col, row
+    if symmetry & 1:
+        row = size - 1 - row
+    if symmetry & 2:
+        col = size - 1 - col
+    return row, col
+
+def inverse_transform(row, col, symmetry, size):
+    if symmetry & 1:
+        row = size - 1 - row
+    if symmetry & 2:
+        col = size - 1 - col
+    if symmetry & 4:
+        row, col = col, row
+    return row, col
 
 class GomokuGame:
-    def __init__(self, lang):
-        self.board_size = config.board_size
+    def __init__(self, lang, board_size=None):
+        self.board_size = board_size or config.board_size
         self.board = [[None for _ in range(self.board_size)] for _ in range(self.board_size)]
         self.current_player = 'black'
         self.game_over = False
@@ -10,8 +49,33 @@ class GomokuGame:
         self.last_move = None
         self.move_count = 0
         self.lang = lang
+        self.undo_stack = []
 
-        self.win_cache = {}
+        zobrist = _zobrist_keys(self.board_size)
+        # Хеш позиции после каждой из 8 симметрий; минимальный - канонический.
+        # symmetry_hashes[0] - обычный хеш Zobrist позиции без преобразования
+        self.symmetry_keys = {
+            player: [
+                [tuple(zobrist[player][r][c] for r, c in (transform(i, j, symmetry, self.board_size) for symmetry in SYMMETRIES))
+                 for j in range(self.board_size)]
+                for i in range(self.board_size)
+            ]
+            for player in ('black', 'white')
+        }
+        self.symmetry_hashes = [0] * len(SYMMETRIES)
+        self.transposition_table = TranspositionTable(config.tt_size)
+        # board остается основным представлением (для display_board и эвристик),
+        # битборд дублирует его для быстрой проверки победы
+        self.bitboard = BitBoard(self.board_size) if config.use_bitboard else None
+        
+        # Кандидаты для бота: пустые клетки рядом с камнями
+        self.neighborhood = self._precalculate_neighborhood(config.candidate_radius)
+        self.neighbor_count = [[0] * self.board_size for _ in range(self.board_size)]
+        self.candidates = set()
+        
+        self.evaluator = LineEvaluator(self)
+        # Без NumPy эвристики бота считаются поклеточно
+        self.heatmap = heatmap.HeatMapEvaluator(self.board_size) if config.use_numpy and heatmap.np else None
         
         # Color codes
         self.colors = {
@@ -31,6 +95,12 @@ class GomokuGame:
         }
         
         self.grid_lines = self._precalculate_grid()
+        self.row_prefix = f"{self.colors['grid']}  │{self.colors['reset']}"
+        self.symbols, self.cell_glyphs = self._precalculate_glyphs()
+        
+        self.frames_rendered = 0
+        self.render_time_total = 0.0
+        self.last_render_ms = 0.0
     
     def _precalculate_grid(self):
         lines = []
@@ -45,6 +115,23 @@ class GomokuGame:
         
         return lines
     
+    def _precalculate_neighborhood(self, radius):
+        size = self.board_size
+        neighborhood = []
+        
+        for i in range(size):
+            row = []
+            for j in range(size):
+                row.append([
+                    (r, c)
+                    for r in range(max(0, i - radius), min(size, i + radius + 1))
+                    for c in range(max(0, j - radius), min(size, j + radius + 1))
+                    if (r, c) != (i, j)
+                ])
+            neighborhood.append(row)
+        
+        return neighborhood
+    
     def get_color_code(self, color_name):
         colors = {
             'black': '\033[30m',
@@ -71,84 +158,216 @@ class GomokuGame:
         }
         return bright_colors.get(color_name, '\033[1;37m')
     
-    def display_board(self, selected_cell=None):
-        print(self.grid_lines[0])
+    def _precalculate_glyphs(self):
+        """Строки клеток для каждого состояния (обычная, курсор, последний ход)
+        и содержимого клетки, вместе с правой границей клетки"""
+        reset = self.colors['reset']
+        grid = self.colors['grid']
+        symbols = {
+            'normal': {
+                None: f"{grid}∙{reset}",
+                'black': f"{self.colors['black']}●{reset}",
+                'white': f"{self.colors['white']}○{reset}"
+            },
+            'selected': {
+                None: f"{self.colors['cursor']}✧{reset}",
+                'black': f"{self.colors['cursor']}◉{reset}",
+                'white': f"{self.colors['cursor']}◌{reset}"
+            },
+            'last': {
+                None: f"{grid}∙{reset}",
+                'black': f"{self.get_bright_color_code(config.black_color)}●{reset}",
+                'white': f"{self.get_bright_color_code(config.white_color)}●{reset}"
+            }
+        }
+        cells = {
+            state: {cell: f" {symbol} {grid}│{reset}" for cell, symbol in glyphs.items()}
+            for state, glyphs in symbols.items()
+        }
+        self.glyph_colors = (config.black_color, config.white_color)
+        return symbols, cells
+    
+    def _refresh_glyphs(self):
+        """Пересчет таблиц, если цвета камней сменили в настройках"""
+        if self.glyph_colors != (config.black_color, config.white_color):
+            self.colors['black'] = self.get_color_code(config.black_color)
+            self.colors['white'] = self.get_color_code(config.white_color)
+            self.symbols, self.cell_glyphs = self._precalculate_glyphs()
+    
+    def board_text(self, selected_cell=None):
+        """Кадр доски одной строкой (без завершающего перевода строки)"""
+        self._refresh_glyphs()
+        normal = self.cell_glyphs['normal']
+        row_prefix = self.row_prefix
+        parts = [self.grid_lines[0]]
         
         for i, row in enumerate(self.board):
-            line = f"{self.colors['grid']}  │{self.colors['reset']}"
-            
-            for j, cell in enumerate(row):
-                is_selected = selected_cell and selected_cell[0] == i and selected_cell[1] == j
-                is_last_move = self.last_move and self.last_move[0] == i and self.last_move[1] == j
-                
-                if is_last_move:
-                    if cell == 'black':
-                        bright_color = self.get_bright_color_code(config.black_color)
-                        symbol = f"{bright_color}●{self.colors['reset']}"
-                    elif cell == 'white':
-                        bright_color = self.get_bright_color_code(config.white_color)
-                        symbol = f"{bright_color}●{self.colors['reset']}"
-                    else:
-                        symbol = f"{self.colors['grid']}∙{self.colors['reset']}"
-                elif is_selected:
-                    if cell == 'black':
-                        symbol = f"{self.colors['cursor']}◉{self.colors['reset']}"
-                    elif cell == 'white':
-                        symbol = f"{self.colors['cursor']}◌{self.colors['reset']}"
-                    else:
-                        symbol = f"{self.colors['cursor']}✧{self.colors['reset']}"
-                else:
-                    if cell == 'black':
-                        symbol = f"{self.colors['black']}●{self.colors['reset']}"
-                    elif cell == 'white':
-                        symbol = f"{self.colors['white']}○{self.colors['reset']}"
-                    else:
-                        symbol = f"{self.colors['grid']}∙{self.colors['reset']}"
-                
-                line += f" {symbol} {self.colors['grid']}│{self.colors['reset']}"
-            
-            print(line)
-            
-            if i < self.board_size - 1:
-                print(self.grid_lines[i + 1])
+            cells = [normal[cell] for cell in row]
+            if selected_cell and selected_cell[0] == i:
+                cells[selected_cell[1]] = self.cell_glyphs['selected'][row[selected_cell[1]]]
+            if self.last_move and self.last_move[0] == i:
+                cells[self.last_move[1]] = self.cell_glyphs['last'][row[self.last_move[1]]]
+            parts.append(row_prefix + ''.join(cells))
+            parts.append(self.grid_lines[i + 1])
         
-        print(self.grid_lines[-1])
+        return '\n'.join(parts)
+    
+    def display_board(self, selected_cell=None):
+        started = time.perf_counter()
+        frame = self.board_text(selected_cell)
+        if self.last_move:
+            frame += '\n' + self.last_move_text()
+        sys.stdout.write(frame + '\n')
+        sys.stdout.flush()
+        self.record_render_time(time.perf_counter() - started)
+    
+    def record_render_time(self, seconds):
+        """Счетчик времени отрисовки кадров (включая запись в терминал)"""
+        self.frames_rendered += 1
+        self.render_time_total += seconds
+        self.last_render_ms = seconds * 1000
+    
+    def cell_symbol(self, row, col, selected_cell=None):
+        """Символ клетки с цветом: последний ход, курсор или обычная клетка"""
+        if self.last_move and self.last_move[0] == row and self.last_move[1] == col:
+            state = 'last'
+        elif selected_cell and selected_cell[0] == row and selected_cell[1] == col:
+            state = 'selected'
+        else:
+            state = 'normal'
+        return self.symbols[state][self.board[row][col]]
+    
+    def last_move_text(self):
+        row, col = self.last_move
+        player = self.board[row][col]
+        player_name = self.lang.get('color_black', 'Black') if player == "black" else self.lang.get('color_white', 'White')
+        if config.language == 'ru_ru':
+            return f"Последний ход: {player_name} ({row}, {col})"
+        return f"Last move: {player_name} ({row}, {col})"
+    
+    def place_stone(self, row, col, player):
+        """Ставит камень без проверки правил, обновляя хеш позиции"""
+        self.board[row][col] = player
+        self.symmetry_hashes = [h ^ k for h, k in zip(self.symmetry_hashes, self.symmetry_keys[player][row][col])]
+        if self.bitboard:
+            self.bitboard.set(row, col, player)
+        if self.heatmap:
+            self.heatmap.set(row, col, player)
         
-        black_symbol = f"{self.colors['black']}●{self.colors['reset']}"
-        white_symbol = f"{self.colors['white']}○{self.colors['reset']}"
-        cursor_symbol = f"{self.colors['cursor']}✧{self.colors['reset']}"
+        self.candidates.discard((row, col))
+        for r, c in self.neighborhood[row][col]:
+            self.neighbor_count[r][c] += 1
+            if self.board[r][c] is None:
+                self.candidates.add((r, c))
         
-        bright_black = f"{self.get_bright_color_code(config.black_color)}●{self.colors['reset']}"
-        bright_white = f"{self.get_bright_color_code(config.white_color)}●{self.colors['reset']}"
+        self.evaluator.update(row, col)
+    
+    def remove_stone(self, row, col):
+        player = self.board[row][col]
+        self.board[row][col] = None
+        self.symmetry_hashes = [h ^ k for h, k in zip(self.symmetry_hashes, self.symmetry_keys[player][row][col])]
+        if self.bitboard:
+            self.bitboard.unset(row, col, player)
+        if self.heatmap:
+            self.heatmap.unset(row, col)
         
-        if self.last_move:
-            row, col = self.last_move
-            player = self.board[row][col]
-            player_name = self.lang.get('color_black', 'Black') if player == "black" else self.lang.get('color_white', 'White')
-            if config.language == 'ru_ru':
-                print(f"Последний ход: {player_name} ({row}, {col})")
-            else:
-                print(f"Last move: {player_name} ({row}, {col})")
+        for r, c in self.neighborhood[row][col]:
+            self.neighbor_count[r][c] -= 1
+            if self.neighbor_count[r][c] == 0:
+                self.candidates.discard((r, c))
+        if self.neighbor_count[row][col] > 0:
+            self.candidates.add((row, col))
+        
+        self.evaluator.update(row, col)
+    
+    def canonical_key(self):
+        """(канонический хеш, симметрия, переводящая позицию в каноническую).
+        
+        Зеркальные и повернутые позиции дают один ключ; ходы, сохраненные
+        под ним, переводятся через to_canonical/from_canonical.
+        """
+        key = min(self.symmetry_hashes)
+        return key, self.symmetry_hashes.index(key)
+    
+    def to_canonical(self, move, symmetry):
+        return transform(move[0], move[1], symmetry, self.board_size)
+    
+    def from_canonical(self, move, symmetry):
+        return inverse_transform(move[0], move[1], symmetry, self.board_size)
+    
+    def get_candidates(self):
+        """Клетки-кандидаты в порядке обхода доски; на пустой доске - центр"""
+        if self.candidates:
+            return sorted(self.candidates)
+        center = self.board_size // 2
+        if self.board[center][center] is None:
+            return [(center, center)]
+        return []
     
     def make_move(self, row, col):
         if self.board[row][col] is None and not self.game_over:
-            self.board[row][col] = self.current_player
-            self.last_move = (row, col)
-            self.move_count += 1
-            
-            if self.fast_check_win(row, col):
-                self.game_over = True
-                self.winner = self.current_player
-            elif self.move_count == self.board_size * self.board_size:
-                self.game_over = True
-            else:
-                self.current_player = 'white' if self.current_player == 'black' else 'black'
+            self.push((row, col))
             return True
         return False
     
+    def push(self, move):
+        """Ход текущего игрока без проверки правил; отменяется через pop()"""
+        row, col = move
+        self.undo_stack.append((row, col, self.current_player, self.last_move, self.game_over, self.winner))
+        self.place_stone(row, col, self.current_player)
+        self.last_move = move
+        self.move_count += 1
+        
+        if self.fast_check_win(row, col):
+            self.game_over = True
+            self.winner = self.current_player
+        elif self.move_count == self.board_size * self.board_size:
+            self.game_over = True
+        else:
+            self.current_player = 'white' if self.current_player == 'black' else 'black'
+    
+    def pop(self):
+        """Отменяет последний push(), восстанавливая все состояние партии"""
+        row, col, player, last_move, game_over, winner = self.undo_stack.pop()
+        self.remove_stone(row, col)
+        self.current_player = player
+        self.last_move = last_move
+        self.game_over = game_over
+        self.winner = winner
+        self.move_count -= 1
+    
+    def get_history(self):
+        """Ходы партии по порядку"""
+        return [(row, col) for row, col, _, _, _, _ in self.undo_stack]
+    
+    def sync_history(self, history):
+        """Переводит партию в позицию после ходов history через pop/push.
+        
+        Общий с текущей партией префикс не переигрывается. Возвращает
+        False, если позиция уже совпадала.
+        """
+        current = self.get_history()
+        common = 0
+        while common < min(len(current), len(history)) and current[common] == tuple(history[common]):
+            common += 1
+        if common == len(current) == len(history):
+            return False
+        
+        for _ in range(len(current) - common):
+            self.pop()
+        for move in history[common:]:
+            self.push(tuple(move))
+        return True
+    
     def fast_check_win(self, row, col):
         """Оптимизированная проверка победы"""
-        player = self.board[row][col]
+        return self.would_win(row, col, self.board[row][col])
+    
+    def would_win(self, row, col, player):
+        """Даст ли камень player в (row, col) пятерку; доска не изменяется"""
+        if self.bitboard:
+            return self.bitboard.would_win(row, col, player)
+        
         directions = [(1, 0), (0, 1), (1, 1), (1, -1)]
         
         for dx, dy in directions:
@@ -173,6 +392,12 @@ class GomokuGame:
         
         return False
     
+    def winning_cells(self, player):
+        """Клетки, где камень player сразу дает пятерку, в порядке обхода доски"""
+        if self.bitboard:
+            return self.bitboard.winning_cells(player)
+        return [move for move in self.get_candidates() if self.would_win(move[0], move[1], player)]
+    
     def check_win(self, row, col):
         """Полная проверка победы (для бота)"""
         return self.fast_check_win(row, col)
@@ -187,4 +412,13 @@ class GomokuGame:
         self.winner = None
         self.last_move = None
         self.move_count = 0
-        self.win_cache.clear()
\ No newline at end of file
+        self.undo_stack = []
+        self.symmetry_hashes = [0] * len(SYMMETRIES)
+        self.transposition_table.clear()
+        if self.bitboard:
+            self.bitboard.clear()
+        if self.heatmap:
+            self.heatmap.clear()
+        self.neighbor_count = [[0] * self.board_size for _ in range(self.board_size)]
+        self.candidates.clear()
+        self.evaluator.reset()
\ No newline at end of file
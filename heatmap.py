@@ -0,0 +1,84 @@
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from bitboard import DIRECTIONS
+
+EMPTY = 0
+STONES = {'black': 1, 'white': 2}
+EDGE = 3
+
+# Рамка вокруг доски: самый дальний сдвиг - 4 клетки в evaluate_position
+PADDING = 4
+
+class HeatMapEvaluator:
+    """Оценка всех клеток доски сразу на NumPy.
+
+    Доска хранится массивом int8 с рамкой EDGE, так что сдвиг на клетку
+    вдоль направления - это срез. Эвристика бота evaluate_position
+    считается сразу для всей доски суммой по срезам и дает те же числа,
+    что и поклеточный вариант.
+    """
+
+    def __init__(self, board_size):
+        self.board_size = board_size
+        size = board_size + 2 * PADDING
+        self.padded = np.full((size, size), EDGE, dtype=np.int8)
+        self.cells = self.padded[PADDING:PADDING + board_size, PADDING:PADDING + board_size]
+        self.cells[:] = EMPTY
+
+        center = board_size // 2
+        rows, cols = np.indices((board_size, board_size))
+        self.center_distance = np.abs(rows - center) + np.abs(cols - center)
+
+    def clear(self):
+        self.cells[:] = EMPTY
+
+    def set(self, row, col, player):
+        self.cells[row, col] = STONES[player]
+
+    def unset(self, row, col):
+        self.cells[row, col] = EMPTY
+
+    def _shift(self, array, dr, dc):
+        """Значения array в клетках (row + dr, col + dc) для всей доски"""
+        top = PADDING + dr
+        left = PADDING + dc
+        return array[top:top + self.board_size, left:left + self.board_size]
+
+    def _masks(self, player):
+        own = self.padded == STONES[player]
+        empty = self.padded == EMPTY
+        return own, empty, ~(own | empty)
+
+    def position_scores(self, player):
+        """evaluate_position для каждой клетки"""
+        own, _, blocked = self._masks(player)
+        score = np.zeros((self.board_size, self.board_size), dtype=np.int64)
+
+        for dx, dy in DIRECTIONS:
+            line = np.zeros_like(score)
+            for sign in (1, -1):
+                alive = np.ones_like(score, dtype=bool)
+                for step in range(1, 5):
+                    dr, dc = dx * step * sign, dy * step * sign
+                    # Пустые клетки пропускаются, серия обрывается на чужом камне или крае
+                    alive &= ~self._shift(blocked, dr, dc)
+                    line += alive & self._shift(own, dr, dc)
+            score += np.where(line >= 2, line * line, 0)
+
+        return score
+
+    def strategic_weights(self, player, opponent):
+        """Веса strategic_move для всей доски"""
+        return ((self.board_size - self.center_distance) * 2
+                + self.position_scores(player) * 3
+                + self.position_scores(opponent) * 2)
+
+    def best(self, scores, candidates):
+        """Первый кандидат с максимальной оценкой"""
+        if not candidates:
+            return None
+        rows, cols = np.array(candidates).T
+        return candidates[int(np.argmax(scores[rows, cols]))]
\ No newline at end of file
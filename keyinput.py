@@ -0,0 +1,154 @@
+"""Ввод с клавиатуры без Enter для Windows и POSIX-терминалов.
+
+read_key() возвращает символ ('q', ' ', 'й') или имя клавиши ('up',
+'down', 'left', 'right', 'enter', 'escape', ...). На POSIX терминал
+переводится в режим cbreak один раз на сессию (with reader: ...),
+а escape-последовательности стрелок разбираются в имена клавиш.
+"""
+import codecs
+import os
+import sys
+import time
+
+UP = 'up'
+DOWN = 'down'
+LEFT = 'left'
+RIGHT = 'right'
+ENTER = 'enter'
+ESCAPE = 'escape'
+BACKSPACE = 'backspace'
+
+# Хвосты последовательностей после ESC (CSI - '[', SS3 - 'O')
+ESCAPE_SEQUENCES = {
+    '[A': UP, '[B': DOWN, '[C': RIGHT, '[D': LEFT,
+    'OA': UP, 'OB': DOWN, 'OC': RIGHT, 'OD': LEFT,
+    '[H': 'home', '[F': 'end', 'OH': 'home', 'OF': 'end',
+    '[1~': 'home', '[4~': 'end', '[7~': 'home', '[8~': 'end',
+    '[2~': 'insert', '[3~': 'delete', '[5~': 'page_up', '[6~': 'page_down'
+}
+
+# Скан-коды Windows после префикса '\xe0' или '\x00'
+WINDOWS_SCAN_CODES = {
+    'H': UP, 'P': DOWN, 'K': LEFT, 'M': RIGHT,
+    'G': 'home', 'O': 'end', 'R': 'insert', 'S': 'delete', 'I': 'page_up', 'Q': 'page_down'
+}
+
+CONTROL_KEYS = {'\r': ENTER, '\n': ENTER, '\x1b': ESCAPE, '\x7f': BACKSPACE, '\x08': BACKSPACE}
+
+# Сколько ждать продолжения после одиночного ESC
+ESCAPE_TIMEOUT = 0.05
+
+def parse_key(buffer, final=False):
+    """(клавиша, число разобранных символов) из начала buffer или None,
+    если последовательность еще не дочитана. final - больше данных не будет."""
+    if not buffer:
+        return None
+    first = buffer[0]
+    if first != '\x1b':
+        return CONTROL_KEYS.get(first, first), 1
+    if len(buffer) == 1:
+        return (ESCAPE, 1) if final else None
+
+    if buffer[1] == 'O':
+        if len(buffer) < 3:
+            return (ESCAPE, 1) if final else None
+        return ESCAPE_SEQUENCES.get(buffer[1:3], ESCAPE), 3
+    if buffer[1] == '[':
+        # CSI: параметры (цифры, ';') и завершающий символ из диапазона @..~
+        for index in range(2, len(buffer)):
+            if '@' <= buffer[index] <= '~':
+                return ESCAPE_SEQUENCES.get(buffer[1:index + 1], ESCAPE), index + 1
+            if not (buffer[index].isdigit() or buffer[index] == ';'):
+                return ESCAPE, 1
+        return (ESCAPE, 1) if final else None
+    return ESCAPE, 1
+
+class KeyReader:
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdin
+        self.pending = ''
+        self.saved_mode = None
+        self.depth = 0
+        if os.name == 'nt':
+            import msvcrt
+            self.msvcrt = msvcrt
+        else:
+            self.msvcrt = None
+            self.decoder = None
+
+    def __enter__(self):
+        """Режим cbreak на все время сессии (вложенные сессии не переключают его повторно)"""
+        self.depth += 1
+        if self.depth == 1 and self.msvcrt is None and self.stream.isatty():
+            import termios
+            import tty
+            fd = self.stream.fileno()
+            self.saved_mode = termios.tcgetattr(fd)
+            # cbreak, а не raw: Ctrl+C и перевод строки при выводе продолжают работать
+            tty.setcbreak(fd)
+        return self
+
+    def __exit__(self, *exc_info):
+        self.depth -= 1
+        if self.depth == 0 and self.saved_mode is not None:
+            import termios
+            termios.tcsetattr(self.stream.fileno(), termios.TCSADRAIN, self.saved_mode)
+            self.saved_mode = None
+
+    def read_key(self, timeout=None):
+        """Следующая клавиша; с timeout (секунды) - None, если за это время ничего не нажато"""
+        if self.msvcrt is not None:
+            return self._read_windows(timeout)
+        return self._read_posix(timeout)
+
+    def _read_windows(self, timeout):
+        if timeout is not None:
+            deadline = time.time() + timeout
+            while not self.msvcrt.kbhit():
+                if time.time() >= deadline:
+                    return None
+                time.sleep(0.01)
+
+        char = self.msvcrt.getwch()
+        if char in ('\x00', '\xe0'):
+            code = self.msvcrt.getwch()
+            return WINDOWS_SCAN_CODES.get(code, code)
+        return CONTROL_KEYS.get(char, char)
+
+    def _read_posix(self, timeout):
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            key = parse_key(self.pending)
+            if key is not None:
+                break
+
+            # Незаконченная escape-последовательность дочитывается недолго
+            wait = ESCAPE_TIMEOUT if self.pending else None
+            if deadline is not None:
+                remaining = max(0.0, deadline - time.time())
+                wait = remaining if wait is None else min(wait, remaining)
+            if not self._fill(wait):
+                if self.pending:
+                    key = parse_key(self.pending, final=True)
+                    break
+                if deadline is not None and time.time() >= deadline:
+                    return None
+
+        name, length = key
+        self.pending = self.pending[length:]
+        return name
+
+    def _fill(self, timeout):
+        """Дочитывает доступные байты в pending; False, если за timeout ничего не пришло"""
+        import select
+        fd = self.stream.fileno()
+        ready, _, _ = select.select([fd], [], [], timeout)
+        if not ready:
+            return False
+        data = os.read(fd, 64)
+        if not data:
+            raise EOFError("stdin closed")
+        if self.decoder is None:
+            self.decoder = codecs.getincrementaldecoder(self.stream.encoding or 'utf-8')(errors='replace')
+        self.pending += self.decoder.decode(data)
+        return True
\ No newline at end of file
@@ -1,20 +1,31 @@
 import os
 import sys
 import json
-import msvcrt
+import time
 from game import GomokuGame
-from bot import GomokuBot
+from keyinput import KeyReader, UP, DOWN, LEFT, RIGHT
 from config import config
 from database import database
+from recording import GameRecord
+from renderer import BoardRenderer
+from thinker import BotThinker
+
+SPINNER = '|/-\\'
 
 class GomokuApp:
     def __init__(self):
         config.load_config()
         self.lang = self.load_language()
         self.game = None
-        self.bot = None
+        self.thinker = None
+        self.renderer = None
         self.current_screen = "menu"
         self.selected_cell = None
+        self.record = None
+        self.turn_started = None
+        # Сообщение о последнем событии партии под доской
+        self.message = None
+        self.keys = KeyReader()
         
     def load_language(self):
         try:
@@ -87,25 +98,12 @@ class GomokuApp:
         input(f"\n{self.lang.get('press_enter', 'Press Enter to continue...')}")
     
     def get_key(self):
-        """Получает нажатую клавишу без ожидания Enter"""
-        if os.name == 'nt':
-            key = msvcrt.getch()
-            if key == b'\xe0':
-                key = msvcrt.getch()
-                return key
-            return key
-        else:
-
-            import termios
-            import tty
-            fd = sys.stdin.fileno()
-            old_settings = termios.tcgetattr(fd)
-            try:
-                tty.setraw(sys.stdin.fileno())
-                ch = sys.stdin.read(1)
-            finally:
-                termios.tcsetattr(fd, termios.TCSADRAIN, old_settings)
-            return ch
+        """Получает нажатую клавишу без ожидания Enter: символ или имя клавиши ('up', 'down', ...)"""
+        return self.keys.read_key()
+    
+    def poll_key(self, timeout):
+        """Клавиша, нажатая в течение timeout секунд, или None"""
+        return self.keys.read_key(timeout)
     
     def display_menu(self):
         self.clear_screen()
@@ -206,6 +204,15 @@ class GomokuApp:
             print(f"║ {self.lang.get('stats_max_streak', 'Max streak')}: {stats['max_win_streak']:<23}          ║")
             
             print("╚══════════════════════════════════════════════╝")
+        
+        by_difficulty = database.query_stats(group_by='difficulty')
+        if by_difficulty:
+            print(f"\n{self.lang.get('stats_by_difficulty', 'By difficulty')}:")
+            for difficulty, row in by_difficulty.items():
+                name = self.lang.get(f'difficulty_{difficulty}', difficulty or '-')
+                avg_moves = row['avg_moves'] if row['avg_moves'] is not None else '-'
+                print(f"  {name:<10} {row['total_games']:>6} {self.lang.get('stats_games', 'games')}  {row['win_rate']:>5}%  "
+                      f"{self.lang.get('stats_avg_moves', 'avg. moves')}: {avg_moves}")
     
     def run(self):
         while True:
@@ -403,91 +410,137 @@ class GomokuApp:
         self.wait_for_enter()
     
     def start_game(self):
+        if self.thinker:
+            self.thinker.close()
         self.game = GomokuGame(self.lang)
-        self.bot = GomokuBot(self.game)
+        self.thinker = BotThinker(self.game)
+        self.record = GameRecord(self.game.board_size)
+        self.renderer = BoardRenderer(self.game)
         self.current_screen = "game"
         self.selected_cell = (self.game.board_size // 2, self.game.board_size // 2)
+        self.message = None
+        # Если игрок за белых, первый ход бота делает run_game
+        self.turn_started = time.time()
+    
+    def status_lines(self, last_line=None):
+        """Строки под доской: сообщение, чей ход, выбранная клетка и last_line.
+        
+        Все, что выводится во время партии, идет через renderer.render():
+        print сдвинул бы экран, и клетки перерисовывались бы не на своих местах.
+        """
+        current_player_name = self.lang.get('color_black', 'Black') if self.game.current_player == "black" else self.lang.get('color_white', 'White')
+        lines = [self.message or "", f"{self.lang.get('game_turn', 'Move')}: {current_player_name}"]
         
-        # Bot makes first move if player is white
-        if config.player_color == 'white':
-            print(f"\n{self.lang.get('game_bot_thinking', 'Bot thinking...')}")
-            bot_move = self.bot.make_move()
-            if bot_move:
-                self.game.make_move(*bot_move)
-                print(f"{self.lang.get('bot_move', 'Bot move at')} ({bot_move[0]}, {bot_move[1]})")
+        if self.selected_cell:
+            row, col = self.selected_cell
+            lines.append(f"{self.lang.get('select_cell', 'Selected cell')}: ({row}, {col})")
+        
+        if last_line:
+            lines.append(last_line)
+        return lines
+    
+    def play_bot_move(self):
+        """Ход бота в фоновом потоке; пока он думает, показывается индикатор
+        и работают Q и M. Возвращает True, если игрок вышел из партии."""
+        thinking = self.lang.get('game_bot_thinking', 'Bot thinking...')
+        nodes_label = self.lang.get('bot_nodes', 'nodes')
+        future = self.thinker.start()
+        frame = 0
+        
+        while not future.done():
+            spinner = SPINNER[frame % len(SPINNER)]
+            self.renderer.render(self.selected_cell, self.status_lines(f"{spinner} {thinking} {self.thinker.elapsed():.1f}s, {self.thinker.nodes} {nodes_label}"))
+            frame += 1
+            
+            key = self.poll_key(0.1)
+            if key in ('q', 'Q', 'm', 'M'):
+                self.thinker.cancel()
+                if key in ('q', 'Q'):
+                    print(f"\n{self.lang.get('game_interrupted', 'Game interrupted.')}")
+                return True
+        
+        bot_move = future.result()
+        if bot_move:
+            self.game.make_move(*bot_move)
+            self.record.add(bot_move, self.thinker.think_time * 1000, self.thinker.nodes)
+            self.message = f"{self.lang.get('bot_move', 'Bot move at')} ({bot_move[0]}, {bot_move[1]}): {self.thinker.think_time:.1f}s, {self.thinker.nodes} {nodes_label}"
+        return False
     
     def run_game(self):
         game_running = True
+        # Экран мог быть очищен меню или прошлой партией
+        self.renderer.invalidate()
         
-        while game_running and not self.game.game_over:
-            self.clear_screen()
-            self.game.display_board(self.selected_cell)
-            
-            current_player_name = self.lang.get('color_black', 'Black') if self.game.current_player == "black" else self.lang.get('color_white', 'White')
-            print(f"\n{self.lang.get('game_turn', 'Move')}: {current_player_name}")
-            
-            if self.selected_cell:
-                row, col = self.selected_cell
-                cell_status = self.lang.get('color_white', 'Empty') if self.game.board[row][col] is None else self.lang.get('color_black', 'Occupied')
-                print(f"{self.lang.get('select_cell', 'Selected cell')}: ({row}, {col})")
-            
-            if self.game.current_player == config.player_color:
-                print(f"{self.lang.get('available_commands', 'Commands:')}")
+        # Терминал в режиме cbreak на всю партию, а не на каждое нажатие
+        with self.keys:
+            while game_running and not self.game.game_over:
+                commands = None
+                if self.game.current_player == config.player_color:
+                    commands = self.lang.get('available_commands', 'Commands:')
+                
+                # Перерисовываются только изменившиеся клетки, без очистки экрана
+                self.renderer.render(self.selected_cell, self.status_lines(commands))
                 
-                while True:
-                    key = self.get_key()
+                if self.game.current_player == config.player_color:
+                    # Пока игрок выбирает ход, бот считает ответы на вероятные ходы
+                    self.thinker.ponder()
                     
-                    if key == b'H':  # Up
-                        self.selected_cell = (max(0, self.selected_cell[0] - 1), self.selected_cell[1])
-                        break
-                    elif key == b'P':  # Down
-                        self.selected_cell = (min(self.game.board_size - 1, self.selected_cell[0] + 1), self.selected_cell[1])
-                        break
-                    elif key == b'K':  # Left
-                        self.selected_cell = (self.selected_cell[0], max(0, self.selected_cell[1] - 1))
-                        break
-                    elif key == b'M':  # Right
-                        self.selected_cell = (self.selected_cell[0], min(self.game.board_size - 1, self.selected_cell[1] + 1))
-                        break
+                    while True:
+                        key = self.get_key()
+                        
+                        if key == UP:
+                            self.selected_cell = (max(0, self.selected_cell[0] - 1), self.selected_cell[1])
+                            break
+                        elif key == DOWN:
+                            self.selected_cell = (min(self.game.board_size - 1, self.selected_cell[0] + 1), self.selected_cell[1])
+                            break
+                        elif key == LEFT:
+                            self.selected_cell = (self.selected_cell[0], max(0, self.selected_cell[1] - 1))
+                            break
+                        elif key == RIGHT:
+                            self.selected_cell = (self.selected_cell[0], min(self.game.board_size - 1, self.selected_cell[1] + 1))
+                            break
 
-                    elif key == b' ':
-                        row, col = self.selected_cell
-                        if self.game.make_move(row, col):
-                            print(f"{self.lang.get('player_move', 'Player move at')} ({row}, {col})")
+                        elif key == ' ':
+                            row, col = self.selected_cell
+                            if self.game.make_move(row, col):
+                                self.record.add((row, col), (time.time() - self.turn_started) * 1000)
+                                self.message = f"{self.lang.get('player_move', 'Player move at')} ({row}, {col})"
+                                
+                                if not self.game.game_over:
+                                    if self.play_bot_move():
+                                        game_running = False
+                                        self.current_screen = "menu"
+                                    self.turn_started = time.time()
+                            else:
+                                self.message = f"{self.lang.get('invalid_move', 'Invalid move!')} {self.lang.get('cell_occupied', 'Cell is already occupied.')}"
+                            break
                             
-                            if not self.game.game_over:
-                                print(f"\n{self.lang.get('game_bot_thinking', 'Bot thinking...')}")
-                                bot_move = self.bot.make_move()
-                                if bot_move:
-                                    self.game.make_move(*bot_move)
-                                    print(f"{self.lang.get('bot_move', 'Bot move at')} ({bot_move[0]}, {bot_move[1]})")
-                        else:
-                            print(f"{self.lang.get('invalid_move', 'Invalid move!')} {self.lang.get('cell_occupied', 'Cell is already occupied.')}")
-                        break
-                        
-                    elif key in [b'q', b'Q']:
-                        print(f"\n{self.lang.get('game_interrupted', 'Game interrupted.')}")
-                        game_running = False
-                        self.current_screen = "menu"
-                        break
+                        elif key in ('q', 'Q'):
+                            print(f"\n{self.lang.get('game_interrupted', 'Game interrupted.')}")
+                            game_running = False
+                            self.current_screen = "menu"
+                            break
 
-                    elif key in [b'r', b'R']:
-                        self.start_game()
-                        return
+                        elif key in ('r', 'R'):
+                            self.start_game()
+                            return
 
-                    elif key in [b'm', b'M']:
+                        elif key in ('m', 'M'):
+                            game_running = False
+                            self.current_screen = "menu"
+                            break
+                
+                else:
+                    if self.play_bot_move():
                         game_running = False
                         self.current_screen = "menu"
-                        break
-            
-            else:
-                print(f"\n{self.lang.get('game_bot_thinking', 'Bot thinking...')}")
-                bot_move = self.bot.make_move()
-                if bot_move:
-                    self.game.make_move(*bot_move)
-                    print(f"{self.lang.get('bot_move', 'Bot move at')} ({bot_move[0]}, {bot_move[1]})")
+                    self.turn_started = time.time()
         
         if self.game.game_over:
+            # Поиск ответов, начатый на ходу игрока, больше не нужен и не
+            # должен занимать процессор, пока экран итогов ждет ввода
+            self.thinker.cancel()
             self.clear_screen()
             self.game.display_board()
             
@@ -508,7 +561,7 @@ class GomokuApp:
             else:
                 result = 'draw'
             
-            database.add_game_result(result, config.difficulty, config.board_size)
+            database.add_game_result(result, config.difficulty, config.board_size, config.player_color, self.record)
             
             print(f"\n1. {self.lang.get('game_restart', 'New game')}")
             print(f"2. {self.lang.get('game_main_menu', 'Main menu')}")
@@ -519,6 +572,9 @@ class GomokuApp:
                 self.start_game()
             else:
                 self.current_screen = "menu"
+        
+        if self.current_screen == "menu":
+            self.thinker.close()
 
 if __name__ == "__main__":
     app = GomokuApp()
@@ -0,0 +1,193 @@
+"""Дебютная книга: канонический хеш позиции -> заранее посчитанный ответ.
+
+Позиции ищутся по каноническому хешу GomokuGame (минимум по 8 симметриям
+доски - повороты и отражения), поэтому зеркальные дебюты занимают одну запись. Книга
+хранится отдельным файлом на каждый размер доски: заголовок и
+отсортированные по ключу записи фиксированной длины. Файл отображается
+в память, поиск - бинарный, без загрузки книги целиком.
+
+Построение из self-play:
+    python opening_book.py --sizes 9 15 --games 200 --think-ms 3000
+"""
+import argparse
+import mmap
+import os
+import random
+import struct
+from config import config
+from game import GomokuGame
+
+MAGIC = b'GMKBOOK1'
+HEADER = struct.Struct('<8sHI')
+RECORD = struct.Struct('<QBB')
+
+def book_path(board_size, directory=None):
+    return os.path.join(directory or config.book_dir, f"opening_{board_size}.bin")
+
+def read_entries(path):
+    """Все записи файла книги: {ключ: ход в каноническом виде}"""
+    entries = {}
+    if not os.path.exists(path):
+        return entries
+    with open(path, 'rb') as f:
+        data = f.read()
+    magic, _, count = HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError(f"Not an opening book: {path}")
+    for index in range(count):
+        key, row, col = RECORD.unpack_from(data, HEADER.size + index * RECORD.size)
+        entries[key] = (row, col)
+    return entries
+
+def write_entries(path, board_size, entries):
+    """Записывает книгу атомарно: сначала во временный файл, затем replace"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, board_size, len(entries)))
+        for key in sorted(entries):
+            row, col = entries[key]
+            f.write(RECORD.pack(key, row, col))
+    os.replace(temp_path, path)
+
+class OpeningBook:
+    """Книга одного размера доски, отображенная в память"""
+
+    def __init__(self, board_size, path=None):
+        self.board_size = board_size
+        self.path = path or book_path(board_size)
+        self.data = None
+        self.count = 0
+        self.hits = 0
+
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'rb') as f:
+                self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, size, count = HEADER.unpack_from(self.data, 0)
+        except (OSError, ValueError, struct.error) as e:
+            print(f"Error loading opening book: {e}")
+            self.close()
+            return
+        if magic != MAGIC or size != board_size or len(self.data) < HEADER.size + count * RECORD.size:
+            print(f"Error loading opening book: invalid file {self.path}")
+            self.close()
+            return
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def _find(self, key):
+        low, high = 0, self.count - 1
+        while low <= high:
+            middle = (low + high) // 2
+            record_key, row, col = RECORD.unpack_from(self.data, HEADER.size + middle * RECORD.size)
+            if record_key == key:
+                return row, col
+            if record_key < key:
+                low = middle + 1
+            else:
+                high = middle - 1
+        return None
+
+    def lookup(self, game):
+        """Ответ книги для позиции game в ее собственной ориентации или None"""
+        if not self.count or game.board_size != self.board_size:
+            return None
+        key, symmetry = game.canonical_key()
+        move = self._find(key)
+        if move is None:
+            return None
+        row, col = game.from_canonical(move, symmetry)
+        if game.board[row][col] is not None:
+            return None
+        self.hits += 1
+        return row, col
+
+    def close(self):
+        if self.data is not None:
+            self.data.close()
+        self.data = None
+        self.count = 0
+
+# Открытые книги процесса, по одной на размер доски
+_books = {}
+
+def get_book(board_size):
+    if board_size not in _books:
+        _books[board_size] = OpeningBook(board_size)
+    return _books[board_size]
+
+def build_book(board_size, games, max_moves, think_ms, seed=None, path=None):
+    """Дополняет книгу ответами бота из коротких партий self-play.
+
+    В каждой партии бот играет одним цветом (по очереди черными и белыми),
+    за соперника - случайные ходы рядом с камнями, как у живого игрока.
+    Каждая новая позиция считается один раз; уже известные берутся из книги.
+    Возвращает число добавленных позиций.
+    """
+    # bot импортирует эту книгу, поэтому здесь импорт отложенный
+    from bot import GomokuBot
+
+    path = path or book_path(board_size)
+    entries = read_entries(path)
+    known = len(entries)
+    rng = random.Random(seed)
+    saved = dict(vars(config))
+    config.opening_book = False
+    config.search_time_ms = think_ms
+
+    try:
+        game = GomokuGame({}, board_size)
+        bot = GomokuBot(game, 'hard')
+        try:
+            for index in range(games):
+                game.sync_history([])
+                engine_player = 'black' if index % 2 == 0 else 'white'
+                while game.move_count < max_moves and not game.game_over:
+                    if game.current_player != engine_player:
+                        game.push(rng.choice(game.get_candidates()))
+                        continue
+
+                    key, symmetry = game.canonical_key()
+                    if key in entries:
+                        move = game.from_canonical(entries[key], symmetry)
+                    else:
+                        move = bot.make_move()
+                        if move is None:
+                            break
+                        entries[key] = game.to_canonical(move, symmetry)
+                    game.push(move)
+        finally:
+            bot.close()
+    finally:
+        config.__dict__.update(saved)
+
+    write_entries(path, board_size, entries)
+    # Следующий get_book откроет обновленный файл
+    book = _books.pop(board_size, None)
+    if book:
+        book.close()
+    return len(entries) - known
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the Gomoku opening book from self-play")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[config.board_size])
+    parser.add_argument('--games', type=int, default=100, help="self-play games per board size")
+    parser.add_argument('--max-moves', type=int, default=config.book_max_moves, help="book depth in moves")
+    parser.add_argument('--think-ms', type=int, default=3000, help="search time per new position")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--dir', default=config.book_dir, help="directory for the book files")
+    args = parser.parse_args(argv)
+
+    for board_size in args.sizes:
+        path = book_path(board_size, args.dir)
+        added = build_book(board_size, args.games, args.max_moves, args.think_ms, args.seed, path)
+        print(f"{path}: {added} new positions, {len(read_entries(path))} total")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
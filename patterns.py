@@ -0,0 +1,133 @@
+from bitboard import DIRECTIONS
+
+# Окно из 9 клеток (по 4 с каждой стороны) вдоль направления. Центр
+# считается камнем игрока, остальные 8 клеток кодируются в троичной
+# системе: 0 - пусто, 1 - свой камень, 2 - камень соперника или край доски.
+RADIUS = 4
+WINDOW = 2 * RADIUS + 1
+CELLS = WINDOW - 1
+
+NONE = 0
+TWO = 1
+OPEN_TWO = 2
+THREE = 3
+OPEN_THREE = 4
+FOUR = 5
+OPEN_FOUR = 6
+FIVE = 7
+
+CLASS_NAMES = [None, 'two', 'open_two', 'three', 'open_three', 'four', 'open_four', 'five']
+
+# BASE3[m] - троичный код битовой маски m из 8 клеток с цифрой 1 на месте единиц
+BASE3 = [sum(3 ** k for k in range(CELLS) if m >> k & 1) for m in range(1 << CELLS)]
+
+def _decode(code):
+    """Код -> список из 9 клеток с центром (1) на позиции RADIUS"""
+    cells = []
+    for _ in range(CELLS):
+        cells.append(code % 3)
+        code //= 3
+    return cells[:RADIUS] + [1] + cells[RADIUS:]
+
+def _encode(cells):
+    code = 0
+    for value in reversed(cells[:RADIUS] + cells[RADIUS + 1:]):
+        code = code * 3 + value
+    return code
+
+def _segments(cells):
+    """Пятерки клеток окна, содержащие центр и не содержащие чужих камней"""
+    for start in range(RADIUS - 4, RADIUS + 1):
+        segment = cells[start:start + 5]
+        if 2 not in segment:
+            yield start, segment
+
+def _build_table():
+    threat = {}
+
+    def classify(code):
+        if code in threat:
+            return threat[code]
+
+        cells = _decode(code)
+        segments = list(_segments(cells))
+        if any(0 not in segment for _, segment in segments):
+            threat[code] = FIVE
+            return FIVE
+
+        # Клетки, каждая из которых сразу дает пятерку
+        winning = set()
+        for start, segment in segments:
+            if segment.count(1) == 4:
+                winning.add(start + segment.index(0))
+
+        if len(winning) >= 2:
+            result = OPEN_FOUR
+        elif winning:
+            result = FOUR
+        else:
+            # Троек и двоек без продолжения нет: смотрим, во что превращается
+            # линия после еще одного своего камня
+            best = NONE
+            for k in range(WINDOW):
+                if cells[k] == 0 and any(start <= k < start + 5 for start, _ in segments):
+                    cells[k] = 1
+                    after = classify(_encode(cells))
+                    cells[k] = 0
+                    if after == OPEN_FOUR:
+                        best = max(best, OPEN_THREE)
+                    elif after == FOUR:
+                        best = max(best, THREE)
+                    elif after == OPEN_THREE:
+                        best = max(best, OPEN_TWO)
+                    elif after == THREE:
+                        best = max(best, TWO)
+            result = best
+
+        threat[code] = result
+        return result
+
+    table = []
+    for code in range(3 ** CELLS):
+        cells = _decode(code)
+        max_stones = max([segment.count(1) for _, segment in _segments(cells)] or [0])
+        table.append((classify(code), max_stones))
+
+    return table
+
+# PATTERN_TABLE[code] = (класс угрозы, макс. число своих камней в свободной
+# пятерке через центр). Строится один раз при импорте.
+PATTERN_TABLE = _build_table()
+
+def _squeeze(mask):
+    """9-битная маска окна -> 8 бит без центральной клетки"""
+    return (mask & ((1 << RADIUS) - 1)) | ((mask >> (RADIUS + 1)) << RADIUS)
+
+def pattern_code(game, row, col, direction, player):
+    """Код окна вокруг (row, col) по направлению direction (индекс в DIRECTIONS)"""
+    if game.bitboard:
+        own, opp, outside = game.bitboard.window(row, col, direction, player, RADIUS)
+        return BASE3[_squeeze(own)] + 2 * BASE3[_squeeze(opp | outside)]
+
+    dx, dy = DIRECTIONS[direction]
+    board = game.board
+    size = game.board_size
+    code = 0
+    for k in range(WINDOW - 1, -1, -1):
+        if k == RADIUS:
+            continue
+        r = row + dx * (k - RADIUS)
+        c = col + dy * (k - RADIUS)
+        if not (0 <= r < size and 0 <= c < size):
+            value = 2
+        elif board[r][c] is None:
+            value = 0
+        elif board[r][c] == player:
+            value = 1
+        else:
+            value = 2
+        code = code * 3 + value
+    return code
+
+def lookup(game, row, col, direction, player):
+    return PATTERN_TABLE[pattern_code(game, row, col, direction, player)]
\ No newline at end of file
@@ -0,0 +1,77 @@
+"""Запись партии ход за ходом в компактном виде и воспроизведение.
+
+Ходы хранятся как номера клеток (row * board_size + col), время на
+обдумывание (мс) и число узлов поиска - парами после них; все числа
+упакованы в varint (LEB128), так что ход на доске до 11x11 занимает
+один байт.
+"""
+from game import GomokuGame
+
+def encode_varints(values):
+    data = bytearray()
+    for value in values:
+        while value >= 0x80:
+            data.append((value & 0x7F) | 0x80)
+            value >>= 7
+        data.append(value)
+    return bytes(data)
+
+def decode_varints(data):
+    values = []
+    value = 0
+    shift = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            values.append(value)
+            value = 0
+            shift = 0
+    if shift:
+        raise ValueError("Truncated varint data")
+    return values
+
+class GameRecord:
+    """Последовательность ходов партии со временем и узлами на каждый ход"""
+
+    def __init__(self, board_size, moves=None, think_ms=None, nodes=None):
+        self.board_size = board_size
+        self.moves = moves or []
+        self.think_ms = think_ms or [0] * len(self.moves)
+        self.nodes = nodes or [0] * len(self.moves)
+
+    def __len__(self):
+        return len(self.moves)
+
+    def add(self, move, think_ms=0, nodes=0):
+        self.moves.append(tuple(move))
+        self.think_ms.append(max(0, int(think_ms)))
+        self.nodes.append(max(0, int(nodes)))
+
+    def pack(self):
+        """(ходы, время и узлы) - два blob для базы"""
+        moves = encode_varints(row * self.board_size + col for row, col in self.moves)
+        timings = encode_varints(value for pair in zip(self.think_ms, self.nodes) for value in pair)
+        return moves, timings
+
+    @classmethod
+    def unpack(cls, board_size, moves_data, timings_data=None):
+        moves = [divmod(cell, board_size) for cell in decode_varints(moves_data)]
+        timings = decode_varints(timings_data) if timings_data else []
+        if timings and len(timings) != 2 * len(moves):
+            raise ValueError("Move and timing records do not match")
+        return cls(board_size, moves, timings[0::2], timings[1::2])
+
+    def replay(self, move_number=None, lang=None):
+        """GomokuGame в позиции после первых move_number ходов (по умолчанию - всех)"""
+        if move_number is None:
+            move_number = len(self.moves)
+        if not 0 <= move_number <= len(self.moves):
+            raise ValueError(f"Move number out of range: {move_number}")
+
+        game = GomokuGame(lang or {}, self.board_size)
+        for move in self.moves[:move_number]:
+            if not game.make_move(*move):
+                raise ValueError(f"Illegal move in record: {move}")
+        return game
\ No newline at end of file
@@ -0,0 +1,121 @@
+import shutil
+import sys
+import time
+
+# ANSI: позиционирование курсора (строки и столбцы с 1), очистка
+CLEAR_SCREEN = '\033[H\033[2J'
+CLEAR_LINE = '\033[K'
+CLEAR_BELOW = '\033[J'
+
+def move_to(row, col):
+    return f'\033[{row};{col}H'
+
+class BoardRenderer:
+    """Перерисовка доски по разнице кадров.
+
+    Первый кадр (и кадр после invalidate) рисуется целиком, дальше
+    выводятся только клетки, которые могли измениться: старое и новое
+    положение курсора, старый и новый последний ход и новые камни.
+    Строки состояния под доской переписываются на месте. Весь кадр
+    уходит в терминал одной записью.
+
+    Клетки адресуются абсолютными координатами, поэтому экран не должен
+    прокручиваться: вывод идет только через render(), курсор остается
+    в конце последней строки состояния. Если кадр не помещается в
+    терминал или терминал изменил размер, кадр рисуется целиком.
+    """
+
+    # Экранная позиция клетки (0, 0): строка 1 - верхняя рамка, символ
+    # клетки стоит после "  │ " (отступ, рамка, пробел)
+    FIRST_ROW = 2
+    FIRST_COL = 5
+
+    def __init__(self, game, out=None):
+        self.game = game
+        self.out = out or sys.stdout
+        self.frame = None
+        self.selected_cell = None
+        self.last_move = None
+        self.history_length = 0
+        self.terminal_size = None
+        self.frames = 0
+        self.last_frame_bytes = 0
+
+    def invalidate(self):
+        """Следующий кадр будет нарисован целиком (экран изменили извне)"""
+        self.frame = None
+
+    def cell_position(self, row, col):
+        return self.FIRST_ROW + 2 * row, self.FIRST_COL + 4 * col
+
+    def fits(self, terminal_size, lines):
+        """Помещается ли кадр со строками состояния в терминал без прокрутки"""
+        size = self.game.board_size
+        height = self.FIRST_ROW + 2 * size - 1 + max(1, len(lines))
+        width = max([4 * size + 3] + [len(line) for line in lines])
+        return height <= terminal_size.lines and width <= terminal_size.columns
+
+    def render(self, selected_cell=None, status_lines=()):
+        started = time.perf_counter()
+        game = self.game
+        # Строки состояния под доской: последний ход и переданные строки
+        lines = [game.last_move_text()] if game.last_move else []
+        lines.extend(status_lines)
+
+        history_length = len(game.undo_stack)
+        terminal_size = shutil.get_terminal_size()
+        if (self.frame is None or history_length < self.history_length
+                or terminal_size != self.terminal_size or not self.fits(terminal_size, lines)):
+            parts = self._full_frame(selected_cell, lines)
+        else:
+            parts = self._changed_cells(selected_cell, history_length)
+            parts.extend(self._status(lines))
+
+        self.selected_cell = selected_cell
+        self.last_move = game.last_move
+        self.history_length = history_length
+        self.terminal_size = terminal_size
+
+        data = ''.join(parts)
+        self.out.write(data)
+        self.out.flush()
+        self.frames += 1
+        self.last_frame_bytes = len(data.encode('utf-8'))
+        game.record_render_time(time.perf_counter() - started)
+
+    def _full_frame(self, selected_cell, lines):
+        game = self.game
+        size = game.board_size
+        text = game.board_text(selected_cell)
+        self.frame = [[game.cell_symbol(i, j, selected_cell) for j in range(size)] for i in range(size)]
+        # Без перевода строки после последней строки: экран не сдвигается
+        return [CLEAR_SCREEN, text, '\n', '\n'.join(lines)]
+
+    def _status(self, lines):
+        """Строки состояния на их местах; курсор - в конце последней"""
+        row = self.FIRST_ROW + 2 * self.game.board_size
+        if not lines:
+            return [move_to(row, 1), CLEAR_BELOW]
+        parts = []
+        for offset, line in enumerate(lines):
+            parts.append(move_to(row + offset, 1))
+            parts.append(line)
+            parts.append(CLEAR_LINE)
+        parts.append(CLEAR_BELOW)
+        return parts
+
+    def _changed_cells(self, selected_cell, history_length):
+        game = self.game
+        dirty = {self.selected_cell, selected_cell, self.last_move, game.last_move}
+        for row, col, _, _, _, _ in game.undo_stack[self.history_length:history_length]:
+            dirty.add((row, col))
+        dirty.discard(None)
+
+        parts = []
+        for row, col in dirty:
+            symbol = game.cell_symbol(row, col, selected_cell)
+            if symbol != self.frame[row][col]:
+                self.frame[row][col] = symbol
+                parts.append(move_to(*self.cell_position(row, col)))
+                parts.append(symbol)
+        return parts
\ No newline at end of file
@@ -0,0 +1,176 @@
+"""Бот против бота без интерфейса: нагрузочный прогон движка.
+
+Пример:
+    python selfplay.py --black hard --white medium --games 20 --sizes 9 15
+    python selfplay.py --black "hard:search_time_ms=500" --white "hard:search_depth={\"hard\": 2}"
+"""
+import argparse
+import json
+import math
+import random
+import time
+from config import config
+from game import GomokuGame
+from bot import GomokuBot
+
+def parse_engine(spec):
+    """'hard:search_time_ms=500,time_control=false' -> (метка, сложность, настройки config)"""
+    difficulty, _, options = spec.partition(':')
+    settings = {}
+    for option in filter(None, options.split(',')):
+        key, _, value = option.partition('=')
+        key = key.strip()
+        if not hasattr(config, key):
+            raise ValueError(f"Unknown config option: {key}")
+        if key == 'board_size':
+            raise ValueError("board_size is set with --sizes")
+        try:
+            settings[key] = json.loads(value)
+        except ValueError:
+            settings[key] = value
+    return spec, difficulty, settings
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    # Ранговый перцентиль (nearest-rank)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+class SelfPlayRunner:
+    def __init__(self, engines, board_sizes, games, opening_moves=0, seed=None, swap_colors=True):
+        self.engines = engines
+        self.board_sizes = board_sizes
+        self.games = games
+        self.opening_moves = opening_moves
+        self.swap_colors = swap_colors
+        self.rng = random.Random(seed)
+        if seed is not None:
+            # Эвристики бота тоже используют модуль random
+            random.seed(seed)
+
+    def run(self):
+        base_settings = dict(vars(config))
+        latencies = []
+        results = {engine[0]: {'wins': 0, 'losses': 0, 'draws': 0} for engine in self.engines}
+        total_moves = 0
+        total_games = 0
+        started = time.perf_counter()
+
+        try:
+            for board_size in self.board_sizes:
+                for index in range(self.games):
+                    black, white = self.engines
+                    if self.swap_colors and index % 2 == 1:
+                        black, white = white, black
+
+                    winner, moves, game_latencies = self.play_game(board_size, black, white, base_settings)
+                    total_games += 1
+                    total_moves += moves
+                    latencies.extend(game_latencies)
+
+                    for label, side in ((black[0], 'black'), (white[0], 'white')):
+                        if winner is None:
+                            results[label]['draws'] += 1
+                        elif winner == side:
+                            results[label]['wins'] += 1
+                        else:
+                            results[label]['losses'] += 1
+        finally:
+            config.__dict__.update(base_settings)
+
+        elapsed = time.perf_counter() - started
+        for label in results:
+            played = sum(results[label].values())
+            results[label]['win_rate'] = round(results[label]['wins'] / played * 100, 1) if played else 0
+
+        return {
+            'games': total_games,
+            'moves': total_moves,
+            'seconds': round(elapsed, 3),
+            'games_per_sec': round(total_games / elapsed, 3) if elapsed else 0,
+            'moves_per_sec': round(total_moves / elapsed, 3) if elapsed else 0,
+            'latency_ms': {
+                'mean': round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0,
+                'p95': round(percentile(latencies, 0.95) * 1000, 3),
+                'p99': round(percentile(latencies, 0.99) * 1000, 3),
+                'max': round(max(latencies) * 1000, 3) if latencies else 0
+            },
+            'results': results
+        }
+
+    def play_game(self, board_size, black, white, base_settings):
+        # Партия-судья; каждый бот играет на своей копии, созданной под его
+        # настройками: у движков не общая таблица транспозиций, и настройки,
+        # которые читаются при создании партии (use_bitboard, tt_size, ...), действуют
+        game = GomokuGame({}, board_size)
+        bots = {}
+        for side, (label, difficulty, settings) in (('black', black), ('white', white)):
+            config.__dict__.update(base_settings)
+            config.__dict__.update(settings)
+            bots[side] = (GomokuBot(GomokuGame({}, board_size), difficulty), settings)
+        config.__dict__.update(base_settings)
+
+        # Случайный дебют, чтобы детерминированные боты не играли одну и ту же партию
+        for _ in range(self.opening_moves):
+            if game.game_over:
+                break
+            game.make_move(*self.rng.choice(game.get_candidates()))
+
+        latencies = []
+        try:
+            while not game.game_over:
+                bot, settings = bots[game.current_player]
+                config.__dict__.update(base_settings)
+                config.__dict__.update(settings)
+                bot.game.sync_history(game.get_history())
+
+                started = time.perf_counter()
+                move = bot.make_move()
+                latencies.append(time.perf_counter() - started)
+
+                if move is None or not game.make_move(*move):
+                    break
+        finally:
+            for bot, _ in bots.values():
+                bot.close()
+
+        return game.winner, game.move_count, latencies
+
+def format_report(report):
+    latency = report['latency_ms']
+    lines = [
+        f"Games: {report['games']}  Moves: {report['moves']}  Time: {report['seconds']}s",
+        f"Throughput: {report['games_per_sec']} games/s, {report['moves_per_sec']} moves/s",
+        f"Move latency: mean {latency['mean']} ms, p95 {latency['p95']} ms, p99 {latency['p99']} ms, max {latency['max']} ms"
+    ]
+    for label, result in report['results'].items():
+        lines.append(f"{label}: {result['wins']}W {result['losses']}L {result['draws']}D ({result['win_rate']}%)")
+    return '\n'.join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless Gomoku bot-vs-bot self-play")
+    parser.add_argument('--black', default='hard', help="engine: difficulty[:option=value,...]")
+    parser.add_argument('--white', default='medium', help="engine: difficulty[:option=value,...]")
+    parser.add_argument('--games', type=int, default=10, help="games per board size")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[config.board_size])
+    parser.add_argument('--opening-moves', type=int, default=2)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--no-swap', action='store_true', help="keep engine colors fixed")
+    parser.add_argument('--json', help="write the report to this file")
+    args = parser.parse_args(argv)
+
+    engines = [parse_engine(args.black), parse_engine(args.white)]
+    if engines[0][0] == engines[1][0]:
+        engines[1] = (engines[1][0] + ' (2)',) + engines[1][1:]
+
+    runner = SelfPlayRunner(engines, args.sizes, args.games, args.opening_moves, args.seed, not args.no_swap)
+    report = runner.run()
+    print(format_report(report))
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=4, ensure_ascii=False)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,134 @@
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from config import config
+from game import GomokuGame
+from bot import GomokuBot
+
+class BotThinker:
+    """Ход бота в фоновом потоке.
+
+    Бот работает на собственной копии партии, поэтому интерфейс может
+    читать и рисовать основную партию, пока идет поиск. Копия догоняет
+    основную через sync_history, так что таблица транспозиций и кеш
+    угроз сохраняются между ходами. start() возвращает Future с ходом,
+    cancel() прерывает поиск.
+
+    ponder() запускается на ходу игрока: бот заранее ищет ответы на
+    config.ponder_moves самых вероятных его ходов. Если игрок сделал
+    один из них, start() сразу возвращает готовый ответ; иначе поиск
+    все равно идет быстрее за счет заполненной таблицы транспозиций.
+    """
+
+    def __init__(self, game, difficulty=None):
+        self.game = game
+        self.shadow = GomokuGame(game.lang, game.board_size)
+        self.bot = GomokuBot(self.shadow, difficulty)
+        if config.search_workers > 1:
+            # Пул создается до первого потока: fork из потока небезопасен
+            self.bot.start_pool()
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.future = None
+        self.started = None
+        self.think_time = 0.0
+        self.last_nodes = 0
+        # Канонический хеш позиции -> (ответ в канонической ориентации, узлы поиска)
+        self.ponder_cache = {}
+        self.ponder_history = None
+        self.ponder_hits = 0
+
+    def start(self):
+        """Начинает поиск хода для текущей позиции основной партии"""
+        self.cancel()
+        self.ponder_history = None
+        self.started = time.time()
+
+        key, symmetry = self.game.canonical_key()
+        if key in self.ponder_cache:
+            move, self.last_nodes = self.ponder_cache[key]
+            move = self.game.from_canonical(move, symmetry)
+            if self.game.board[move[0]][move[1]] is None:
+                self.ponder_hits += 1
+                self.think_time = time.time() - self.started
+                self.future = Future()
+                self.future.set_result(move)
+                return self.future
+
+        self._reset_cancel()
+        self.future = self.executor.submit(self._think, self.game.get_history())
+        return self.future
+
+    def _think(self, history):
+        self.shadow.sync_history(history)
+        try:
+            return self.bot.make_move()
+        finally:
+            self.last_nodes = self.bot.total_nodes
+            self.think_time = time.time() - self.started
+
+    def ponder(self):
+        """Фоновый поиск ответов на вероятные ходы игрока в текущей позиции.
+
+        Повторный вызов для той же позиции ничего не делает.
+        """
+        history = self.game.get_history()
+        if not config.ponder or self.game.game_over or history == self.ponder_history:
+            return
+        self.cancel()
+        self.ponder_history = history
+        self.ponder_cache.clear()
+        self._reset_cancel()
+        self.future = self.executor.submit(self._ponder, history)
+
+    def _ponder(self, history):
+        shadow = self.shadow
+        shadow.sync_history(history)
+        replies = self.bot.generate_moves(shadow.current_player)[:config.ponder_moves]
+
+        for reply in replies:
+            if self.bot.cancelled:
+                return
+            shadow.push(reply)
+            try:
+                if shadow.game_over:
+                    continue
+                move = self.bot.make_move()
+                # Прерванный поиск мог вернуть недосчитанный ход
+                if move and not self.bot.cancelled:
+                    key, symmetry = shadow.canonical_key()
+                    self.ponder_cache[key] = (shadow.to_canonical(move, symmetry), self.bot.total_nodes)
+            finally:
+                shadow.pop()
+
+    def _reset_cancel(self):
+        self.bot.cancelled = False
+        self.bot.threat_solver.cancelled = False
+
+    @property
+    def thinking(self):
+        return self.future is not None and not self.future.done()
+
+    def elapsed(self):
+        return time.time() - self.started if self.started else 0.0
+
+    @property
+    def nodes(self):
+        """Узлы текущего поиска (вместе с решателем угроз), а после его
+        завершения - итог последнего хода"""
+        if self.thinking:
+            return self.bot.total_nodes
+        return self.last_nodes
+
+    def cancel(self):
+        """Прерывает поиск и ждет, пока поток освободится"""
+        if self.future is None:
+            return
+        self.bot.cancelled = True
+        self.bot.threat_solver.cancelled = True
+        self.future.cancel()
+        wait([self.future])
+        self.future = None
+
+    def close(self):
+        self.cancel()
+        self.executor.shutdown(wait=True)
+        self.bot.close()
\ No newline at end of file
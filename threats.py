@@ -0,0 +1,174 @@
+import time
+import patterns
+from bitboard import DIRECTIONS
+from config import config
+
+class ThreatSearchAborted(Exception):
+    """Превышен лимит узлов или времени решателя, или поиск отменен"""
+
+class ThreatSolver:
+    """Поиск форсированного выигрыша только по угрожающим ходам.
+
+    VCF (victory by continuous fours) - каждый ход атакующего создает
+    четверку, у защиты ровно один ответ. VCT (victory by continuous
+    threats) - допускаются и открытые тройки, защита перебирает клетки
+    на линии угрозы и собственные четверки. Результаты кешируются по
+    каноническому хешу позиции (с учетом симметрий доски) и
+    переиспользуются между ходами партии.
+
+    Поиск ограничен config.threat_node_limit и, если задан, сроком
+    deadline (time.time()); при превышении ход не находится. nodes
+    накапливается между вызовами, его обнуляет владелец (бот - на каждом ходу).
+    """
+
+    def __init__(self, game):
+        self.game = game
+        self.cache = {}
+        self.nodes = 0
+        self.node_limit = 0
+        self.deadline = None
+        self.cancelled = False
+
+    def find_vcf(self, max_depth=None):
+        """Первый ход выигрывающей серии четверок для стороны, которая ходит, или None"""
+        if max_depth is None:
+            max_depth = config.vcf_depth
+        return self._solve(max_depth, patterns.FOUR)
+
+    def find_vct(self, max_depth=None):
+        """Первый ход выигрывающей серии угроз (четверки и открытые тройки) или None"""
+        if max_depth is None:
+            max_depth = config.vct_depth
+        return self._solve(max_depth, patterns.OPEN_THREE)
+
+    def _solve(self, max_depth, min_class):
+        if self.game.game_over:
+            return None
+        if len(self.cache) > config.threat_cache_size:
+            self.cache.clear()
+        self.node_limit = self.nodes + config.threat_node_limit
+        try:
+            return self._attack(self.game.current_player, max_depth, min_class)
+        except ThreatSearchAborted:
+            return None
+
+    def _attack(self, attacker, depth, min_class):
+        """Ход атакующего: возвращает выигрывающий ход или None"""
+        self.nodes += 1
+        if self.nodes > self.node_limit or self.cancelled:
+            raise ThreatSearchAborted()
+        # Узел решателя дорогой, так что время проверяется на каждом
+        if self.deadline is not None and time.time() >= self.deadline:
+            raise ThreatSearchAborted()
+
+        own_wins = self._winning_cells(attacker)
+        if own_wins:
+            return own_wins[0]
+        if depth <= 0:
+            return None
+
+        position, symmetry = self.game.canonical_key()
+        key = (position, attacker, depth, min_class)
+        if key in self.cache:
+            move = self.cache[key]
+            return self.game.from_canonical(move, symmetry) if move else None
+
+        defender = 'black' if attacker == 'white' else 'white'
+        defender_wins = self._winning_cells(defender)
+        if len(defender_wins) >= 2:
+            moves = []
+        elif defender_wins:
+            # Сначала нужно закрыть четверку соперника; атака продолжается,
+            # только если блок сам создает угрозу
+            moves = [move for move in defender_wins if self._threat_class(move, attacker) >= min_class]
+        else:
+            moves = self._threat_moves(attacker, min_class)
+
+        result = None
+        for move in moves:
+            self.game.push(move)
+            try:
+                won = self._defend(attacker, move, depth - 1, min_class)
+            finally:
+                self.game.pop()
+            if won:
+                result = move
+                break
+
+        self.cache[key] = self.game.to_canonical(result, symmetry) if result else None
+        return result
+
+    def _defend(self, attacker, last_move, depth, min_class):
+        """Ход защиты: True, если атакующий выигрывает при любом ответе"""
+        defender = 'black' if attacker == 'white' else 'white'
+        if self._winning_cells(defender):
+            return False
+
+        attacker_wins = self._winning_cells(attacker)
+        if len(attacker_wins) >= 2:
+            return True
+        if attacker_wins:
+            defenses = attacker_wins
+        elif min_class >= patterns.FOUR:
+            return False
+        else:
+            defenses = self._defenses(attacker, defender, last_move)
+
+        for move in defenses:
+            self.game.push(move)
+            try:
+                won = self._attack(attacker, depth, min_class) is not None
+            finally:
+                self.game.pop()
+            if not won:
+                return False
+
+        return True
+
+    def _threat_class(self, move, player, min_class=patterns.NONE):
+        """Сильнейшая угроза камня player в move; направления, где угрозы
+        не ниже min_class быть не может, не классифицируются"""
+        bitboard = self.game.bitboard
+        # Для открытой тройки в окне нужно еще два своих камня, для четверки - три
+        needed = 3 if min_class >= patterns.FOUR else 2 if min_class >= patterns.OPEN_THREE else 0
+        threat = patterns.NONE
+        for direction in range(4):
+            if needed and bitboard and bitboard.stones_near(move[0], move[1], direction, player, patterns.RADIUS) < needed:
+                continue
+            threat = max(threat, patterns.lookup(self.game, move[0], move[1], direction, player)[0])
+        return threat
+
+    def _threat_moves(self, player, min_class):
+        """Кандидаты, создающие угрозу не ниже min_class; четверки идут первыми"""
+        moves = []
+        for move in self.game.get_candidates():
+            threat = self._threat_class(move, player, min_class)
+            if threat >= min_class:
+                moves.append((-threat, move))
+        moves.sort()
+        return [move for _, move in moves]
+
+    def _winning_cells(self, player):
+        return self.game.winning_cells(player)
+
+    def _defenses(self, attacker, defender, last_move):
+        """Ответы на тройку: пустые клетки на линиях угрозы и встречные четверки"""
+        row, col = last_move
+        size = self.game.board_size
+        board = self.game.board
+        defenses = []
+
+        for direction, (dx, dy) in enumerate(DIRECTIONS):
+            if patterns.lookup(self.game, row, col, direction, attacker)[0] < patterns.OPEN_THREE:
+                continue
+            for step in range(-patterns.RADIUS, patterns.RADIUS + 1):
+                r = row + dx * step
+                c = col + dy * step
+                if 0 <= r < size and 0 <= c < size and board[r][c] is None and (r, c) not in defenses:
+                    defenses.append((r, c))
+
+        for move in self._threat_moves(defender, patterns.FOUR):
+            if move not in defenses:
+                defenses.append(move)
+
+        return defenses
\ No newline at end of file
@@ -0,0 +1,56 @@
+class TranspositionTable:
+    """Таблица транспозиций с двумя слотами на индекс.
+
+    Первый слот хранит запись с наибольшей глубиной (depth-preferred),
+    второй перезаписывается всегда (always-replace).
+    """
+    EXACT = 0
+    LOWER = 1
+    UPPER = 2
+
+    def __init__(self, size):
+        # Размер округляется до степени двойки, чтобы индекс брался маской
+        self.size = 1
+        while self.size < size:
+            self.size <<= 1
+        self.mask = self.size - 1
+        self.generation = 0
+        self.hits = 0
+        self.probes = 0
+        self.clear()
+
+    def clear(self):
+        self.deep = [None] * self.size
+        self.recent = [None] * self.size
+        self.generation = 0
+
+    def new_search(self):
+        """Записи прошлых ходов становятся кандидатами на вытеснение"""
+        self.generation += 1
+
+    def probe(self, key):
+        """Возвращает (depth, score, flag, move) или None"""
+        self.probes += 1
+        index = key & self.mask
+
+        entry = self.deep[index]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry[1:5]
+
+        entry = self.recent[index]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry[1:5]
+
+        return None
+
+    def store(self, key, depth, score, flag, move):
+        index = key & self.mask
+        entry = (key, depth, score, flag, move, self.generation)
+
+        deep = self.deep[index]
+        if deep is None or deep[0] == key or depth >= deep[1] or deep[5] != self.generation:
+            self.deep[index] = entry
+        else:
+            self.recent[index] = entry
\ No newline at end of file